@@ -1,14 +1,20 @@
 """
-Pyoneer - Connect 4 AI using Minimax with Alpha-Beta Pruning
+Pyoneer - Connect 4 (and Connect-N) AI using Minimax with Alpha-Beta Pruning
 A tiny, smart, and performant AI opponent.
+
+get_best_move runs a negamax search with principal variation search,
+aspiration windows and late move reductions. The original minimax engine
+is kept and can be selected with engine=ENGINE_MINIMAX for comparison.
 """
 
+import functools
 import math
-import random
+import time
+
+import numpy as np
 
-ROW_COUNT = 6
-COLUMN_COUNT = 7
-WINDOW_LENGTH = 4
+from board import COLUMN_COUNT, ROW_COUNT, WINDOW_LENGTH, Board, get_geometry
+from tt import EXACT, LOWER, UPPER, TranspositionTable
 
 AI_PIECE = 2
 PLAYER_PIECE = 1
@@ -17,210 +23,1054 @@ EMPTY = 0
 # Search depth (higher = smarter but slower)
 DEPTH = 5
 
+# Score of a won position, from the winner's point of view
+WIN_SCORE = 100000000
+# Integer stand-in for infinity, so null windows (alpha, alpha + 1) work
+INFINITY = 10 * WIN_SCORE
+
+ENGINE_NEGAMAX = "negamax"
+ENGINE_MINIMAX = "minimax"
+
+# get_best_move hands positions with this many empty cells or fewer to the
+# exact solver, if it has one, and gives it this long before falling back
+ENDGAME_CELLS = 18
+ENDGAME_TIME_MS = 1000
+
+# get_best_move consults the opening book, if it has one, in positions with
+# fewer moves played than this; the book itself stops after a few
+BOOK_MOVES = ROW_COUNT * COLUMN_COUNT
+
+# Half-width of the window searched around the previous iteration's score
+ASPIRATION_WINDOW = 50
+
+# Moves searched this late at a node, this far from the leaves, get one ply
+# less in a null-window search first
+LMR_MIN_INDEX = 3
+LMR_MIN_DEPTH = 3
+
+# Nodes a search visits between checks of its deadline and node budget
+CHECK_INTERVAL = 256
+
+# get_best_move options per difficulty level, easiest first. The node
+# budget sets the strength, so a level searches as much on a slow machine as
+# on a fast one unless the time budget, which bounds the worst case, runs
+# out first. Its move is not fixed, though: it depends on what the shared
+# transposition table holds from earlier searches and pondering. Only the
+# hardest level plays from the opening book and solves endgames exactly.
+DIFFICULTY_LEVELS = {
+    "easy": {
+        "max_depth": 3,
+        "max_nodes": 150,
+        "time_limit_ms": 100,
+        "book_moves": 0,
+        "endgame_cells": 0,
+    },
+    "medium": {
+        "max_depth": ROW_COUNT * COLUMN_COUNT,
+        "max_nodes": 3000,
+        "time_limit_ms": 300,
+        "book_moves": 0,
+        "endgame_cells": 0,
+    },
+    "hard": {
+        "max_depth": ROW_COUNT * COLUMN_COUNT,
+        "max_nodes": 25000,
+        "time_limit_ms": 1000,
+        "book_moves": BOOK_MOVES,
+        "endgame_cells": ENDGAME_CELLS,
+    },
+}
+
+# Memory for the transposition table shared by get_best_move calls
+TT_SIZE_MB = 16
+
+transposition_table = TranspositionTable(TT_SIZE_MB)
+
+# XORed into the position hash when the AI is to move, so the same grid
+# searched for either side gets its own table entry
+_MAXIMIZING_KEY = 0x9E3779B97F4A7C15
+# Negamax stores scores from the side to move, so its entries get their own
+# keys per side rather than sharing minimax's AI-relative ones
+_NEGAMAX_KEYS = {AI_PIECE: 0x2545F4914F6CDD1D, PLAYER_PIECE: 0x6A09E667F3BCC909}
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search that runs past its deadline or node budget."""
+
+
+class SearchContext:
+    """State shared by every node of one search.
+
+    Besides the table and deadline this holds the move-ordering memory:
+    two killer moves per ply and a history score per piece and cell, both
+    kept for the whole search. nodes and cutoffs count how well the
+    ordering works; cutoffs[i] is the number of cutoffs caused by the i-th
+    move tried at a node, so a good ordering piles them up at index 0.
+    """
+
+    def __init__(
+        self, table=None, deadline=None, node_limit=None, batch_evaluator=None
+    ):
+        self.table = table
+        # time.perf_counter() value after which the search gives up
+        self.deadline = deadline
+        # nodes value at which the search gives up
+        self.node_limit = node_limit
+        # nodes value at which check_budget() next runs
+        self.next_check = 0
+        self.root_moves = 0
+        self.evaluator = None
+        self.killers = []
+        self.history = None
+        self.nodes = 0
+        self.cutoffs = []
+        # Static evaluations, and table lookups and the ones that found a move
+        self.leaves = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        # Negamax only: whether late moves get reduced, and the root's best move
+        self.late_move_reductions = True
+        self.best_move = None
+        # If set, scores all children of a node one ply from the leaves in
+        # one call: batch_evaluator(grids, connect) gets an (n, rows, columns)
+        # stack of grids and returns n integer scores for AI_PIECE
+        self.batch_evaluator = batch_evaluator
+
+    def start(self, board):
+        """Set the root for ply counting, evaluation and the ordering tables."""
+        geometry = board.geometry
+        self.root_moves = board.moves
+        self.evaluator = Evaluator(board, AI_PIECE)
+        if self.history is None or len(self.history[1]) != geometry.bit_count:
+            self.history = [[0] * geometry.bit_count for _ in range(3)]
+            self.killers = [[None, None] for _ in range(geometry.cell_count + 1)]
+            self.cutoffs = [0] * geometry.columns
+
+    def set_budget(self, deadline=None, max_nodes=None):
+        """Limit the searches from now on to deadline and max_nodes more nodes."""
+        self.deadline = deadline
+        self.node_limit = None if max_nodes is None else self.nodes + max_nodes
+        self.next_check = self.nodes
+
+    def check_budget(self):
+        """Raise SearchTimeout if the deadline or node limit has passed.
+
+        Searches call this every CHECK_INTERVAL nodes rather than reading
+        the clock at every node, so a deadline set from another thread
+        takes effect within that many nodes.
+        """
+        self.next_check = self.nodes + CHECK_INTERVAL
+        if self.node_limit is not None:
+            if self.nodes >= self.node_limit:
+                raise SearchTimeout
+            self.next_check = min(self.next_check, self.node_limit)
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def order_moves(self, board, valid_locations, piece, tt_move=None):
+        """Return the columns to search at this node, best candidates first.
+
+        Order: table move, this ply's killers, then history score with the
+        static center-out order breaking ties.
+        """
+        history = self.history[piece]
+        heights = board.heights
+        column_bits = board.geometry.column_bits
+        moves = sorted(
+            _center_first(valid_locations, board.columns),
+            key=lambda col: -history[col * column_bits + heights[col]],
+        )
+        for killer in reversed(self.killers[board.moves - self.root_moves]):
+            if killer is not None and killer != tt_move and killer in moves:
+                moves.remove(killer)
+                moves.insert(0, killer)
+        if tt_move is not None:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        return moves
+
+    def record_cutoff(self, board, col, piece, depth, index):
+        """Remember a move that caused a cutoff, tried index-th at its node."""
+        self.cutoffs[index] += 1
+        killers = self.killers[board.moves - self.root_moves]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        bit_index = col * board.geometry.column_bits + board.heights[col]
+        self.history[piece][bit_index] += depth * depth
+
+
+@functools.lru_cache(maxsize=None)
+def _center_first(valid_locations, columns):
+    """valid_locations sorted center-out, since central columns are stronger."""
+    center = (columns - 1) / 2
+    return tuple(sorted(valid_locations, key=lambda col: abs(col - center)))
+
+
+def _as_board(board):
+    """Accept either a Board or a raw rows x columns grid."""
+    if isinstance(board, Board):
+        return board
+    return Board.from_grid(board)
+
 
 def get_valid_locations(board):
     """Get all columns that can accept a piece."""
-    valid = []
-    for col in range(COLUMN_COUNT):
-        if board[ROW_COUNT - 1][col] == 0:
-            valid.append(col)
-    return valid
+    return list(_as_board(board).valid_locations())
 
 
 def get_next_open_row(board, col):
     """Find the next open row in a column."""
-    for r in range(ROW_COUNT):
-        if board[r][col] == 0:
-            return r
-    return None
+    return _as_board(board).get_next_open_row(col)
 
 
 def drop_piece_copy(board, row, col, piece):
     """Drop a piece on a copy of the board (doesn't modify original)."""
-    import numpy as np
-
     new_board = board.copy()
-    new_board[row][col] = piece
+    if isinstance(new_board, Board):
+        new_board.drop_piece(row, col, piece)
+    else:
+        new_board[row][col] = piece
     return new_board
 
 
 def is_terminal_node(board):
     """Check if the game is over (win or tie)."""
+    board = _as_board(board)
     return (
-        check_win(board, PLAYER_PIECE)
-        or check_win(board, AI_PIECE)
-        or len(get_valid_locations(board)) == 0
+        board.winning_move(PLAYER_PIECE)
+        or board.winning_move(AI_PIECE)
+        or board.is_tie()
     )
 
 
 def check_win(board, piece):
     """Check if a piece has won."""
-    # Horizontal
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT):
-            if (
-                board[r][c] == piece
-                and board[r][c + 1] == piece
-                and board[r][c + 2] == piece
-                and board[r][c + 3] == piece
-            ):
-                return True
-
-    # Vertical
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT - 3):
-            if (
-                board[r][c] == piece
-                and board[r + 1][c] == piece
-                and board[r + 2][c] == piece
-                and board[r + 3][c] == piece
-            ):
-                return True
-
-    # Positive diagonal
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT - 3):
-            if (
-                board[r][c] == piece
-                and board[r + 1][c + 1] == piece
-                and board[r + 2][c + 2] == piece
-                and board[r + 3][c + 3] == piece
-            ):
-                return True
-
-    # Negative diagonal
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(3, ROW_COUNT):
-            if (
-                board[r][c] == piece
-                and board[r - 1][c + 1] == piece
-                and board[r - 2][c + 2] == piece
-                and board[r - 3][c + 3] == piece
-            ):
-                return True
-
-    return False
+    return _as_board(board).winning_move(piece)
 
 
-def score_window(window, piece):
-    """Score a window of 4 slots."""
+def check_win_at(board, row, col):
+    """Check if the piece at (row, col) is part of a winning line."""
+    return _as_board(board).winning_move_at(row, col)
+
+
+def _count_window_score(window, piece):
+    """The window heuristic written out on piece counts; builds the tables."""
     score = 0
     opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+    length = len(window)
 
-    if window.count(piece) == 4:
+    if window.count(piece) == length:
         score += 100
-    elif window.count(piece) == 3 and window.count(EMPTY) == 1:
+    elif window.count(piece) == length - 1 and window.count(EMPTY) == 1:
         score += 5
-    elif window.count(piece) == 2 and window.count(EMPTY) == 2:
+    elif window.count(piece) == length - 2 and window.count(EMPTY) == 2:
         score += 2
 
     # Block opponent
-    if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
+    if window.count(opp_piece) == length - 1 and window.count(EMPTY) == 1:
         score -= 4
 
     return score
 
 
+@functools.lru_cache(maxsize=None)
+def _window_scores(length, piece):
+    """score_window of every possible window, indexed by its base-3 code.
+
+    Cell i of a window contributes value * 3 ** i, with values EMPTY,
+    PLAYER_PIECE and AI_PIECE (0, 1, 2), so 4 cells give 81 codes.
+    """
+    return tuple(
+        _count_window_score([code // 3**i % 3 for i in range(length)], piece)
+        for code in range(3**length)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def window_score_table(length, piece):
+    """_window_scores as a numpy array, plus the base-3 place values."""
+    table = np.array(_window_scores(length, piece), dtype=np.int64)
+    powers = 3 ** np.arange(length, dtype=np.intp)
+    return table, powers
+
+
+def score_window(window, piece):
+    """Score a window of WINDOW_LENGTH slots."""
+    code = 0
+    for value in reversed(window):
+        code = code * 3 + int(value)
+    return _window_scores(len(window), piece)[code]
+
+
+def score_windows(windows, piece):
+    """Vectorized score_window over the last axis of a windows array."""
+    table, powers = window_score_table(windows.shape[-1], piece)
+    return table[windows.astype(np.intp) @ powers]
+
+
+def score_positions(grids, piece, connect=WINDOW_LENGTH):
+    """Evaluate a grid, or a stack of grids shaped (..., rows, columns)."""
+    grids = np.asarray(grids)
+    geometry = get_geometry(*grids.shape[-2:], connect)
+
+    # Favor center column
+    center_col = grids[..., grids.shape[-1] // 2]
+    score = np.count_nonzero(center_col == piece, axis=-1) * 3
+
+    # Horizontal, vertical and both diagonals, gathered in one indexing step
+    windows = geometry.gather_windows(grids)
+    return score + score_windows(windows, piece).sum(axis=-1)
+
+
+def score_leaves(grids, connect=WINDOW_LENGTH):
+    """A SearchContext.batch_evaluator that scores as the Evaluator does."""
+    return score_positions(grids, AI_PIECE, connect).tolist()
+
+
 def score_position(board, piece):
     """Evaluate the entire board position."""
-    score = 0
+    if isinstance(board, Board):
+        return int(score_positions(board.board, piece, board.geometry.connect))
+    return int(score_positions(board, piece))
 
-    # Favor center column
-    center_col = list(board[:, COLUMN_COUNT // 2])
-    center_count = center_col.count(piece)
-    score += center_count * 3
-
-    # Horizontal
-    for r in range(ROW_COUNT):
-        row_array = list(board[r, :])
-        for c in range(COLUMN_COUNT - 3):
-            window = row_array[c : c + WINDOW_LENGTH]
-            score += score_window(window, piece)
-
-    # Vertical
-    for c in range(COLUMN_COUNT):
-        col_array = list(board[:, c])
-        for r in range(ROW_COUNT - 3):
-            window = col_array[r : r + WINDOW_LENGTH]
-            score += score_window(window, piece)
-
-    # Positive diagonal
-    for r in range(ROW_COUNT - 3):
-        for c in range(COLUMN_COUNT - 3):
-            window = [board[r + i][c + i] for i in range(WINDOW_LENGTH)]
-            score += score_window(window, piece)
-
-    # Negative diagonal
-    for r in range(3, ROW_COUNT):
-        for c in range(COLUMN_COUNT - 3):
-            window = [board[r - i][c + i] for i in range(WINDOW_LENGTH)]
-            score += score_window(window, piece)
 
-    return score
+class Evaluator:
+    """
+    score_position(board, piece) kept up to date move by move.
+
+    Holds each window's piece counts for both sides and the running score.
+    push/pop go through the evaluator, touch only the windows through the
+    dropped piece, and keep lines/opp_lines (completed windows per side) so
+    a win is visible without a separate check_win.
+    """
+
+    def __init__(self, board, piece=AI_PIECE):
+        self.board = board
+        self.piece = piece
+        opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+        geometry = board.geometry
+        length = geometry.connect
+        self.length = length
+        self.cell_window_ids = geometry.cell_window_ids
+        self.center = board.columns // 2
+
+        # window_scores[own][opp] is score_window of any window holding own
+        # of our pieces and opp of theirs
+        self.window_scores = [
+            [
+                score_window(
+                    [piece] * own + [opp_piece] * opp + [EMPTY] * (length - own - opp),
+                    piece,
+                )
+                if own + opp <= length
+                else 0
+                for opp in range(length + 1)
+            ]
+            for own in range(length + 1)
+        ]
+
+        windows = geometry.gather_windows(board.board)
+        self.own_counts = np.count_nonzero(windows == piece, axis=-1).tolist()
+        self.opp_counts = np.count_nonzero(windows == opp_piece, axis=-1).tolist()
+        self.lines = self.own_counts.count(length)
+        self.opp_lines = self.opp_counts.count(length)
+        self.score = score_position(board, piece)
+        self._deltas = []
+
+    def push(self, col, piece):
+        """Drop piece into col on the board, update the score, return the row."""
+        board = self.board
+        row = board.push(col, piece)
+        own_counts, opp_counts = self.own_counts, self.opp_counts
+        window_scores = self.window_scores
+        counts = own_counts if piece == self.piece else opp_counts
+        length = self.length
+        delta = 0
+        completed = 0
+        for window_id in self.cell_window_ids[row][col]:
+            before = window_scores[own_counts[window_id]][opp_counts[window_id]]
+            counts[window_id] += 1
+            delta += window_scores[own_counts[window_id]][opp_counts[window_id]] - before
+            if counts[window_id] == length:
+                completed += 1
+        if piece == self.piece:
+            self.lines += completed
+            if col == self.center:
+                delta += 3
+        else:
+            self.opp_lines += completed
+        self.score += delta
+        self._deltas.append(delta)
+        return row
+
+    def pop(self):
+        """Undo the last push() and return its (row, col)."""
+        board = self.board
+        piece = board.history[-1][2]
+        row, col = board.pop()
+        counts = self.own_counts if piece == self.piece else self.opp_counts
+        length = self.length
+        completed = 0
+        for window_id in self.cell_window_ids[row][col]:
+            if counts[window_id] == length:
+                completed += 1
+            counts[window_id] -= 1
+        if piece == self.piece:
+            self.lines -= completed
+        else:
+            self.opp_lines -= completed
+        self.score -= self._deltas.pop()
+        return row, col
+
+
+def _tactics(board, piece):
+    """The immediate tactics for piece to move, as cell masks.
+
+    Returns (wins, threats, playable): the playable cells that complete a
+    line for piece, the empty cells that would complete one for the
+    opponent, and the cells a move can go into.
+    """
+    geometry = board.geometry
+    own = board.bitboards[piece]
+    mask = board.bitboards[1] | board.bitboards[2]
+    playable = (mask + geometry.bottom_mask) & geometry.full_mask
+    wins = geometry.winning_cells(own) & playable
+    threats = geometry.winning_cells(own ^ mask) & ~mask
+    return wins, threats, playable
+
+
+def _cell_column(cells, geometry):
+    """The column of the lowest cell in a nonempty cell mask."""
+    return ((cells & -cells).bit_length() - 1) // geometry.column_bits
+
+
+def _precheck(board, piece):
+    """Settle a node from its immediate tactics before searching it.
+
+    Returns (score, cells). score is WIN_SCORE if piece wins with its next
+    move and -WIN_SCORE if the opponent wins whatever piece plays; cells
+    then holds the move to report. Otherwise score is None and cells holds
+    the moves worth searching: the forced block if there is one, and never
+    a cell right under one of the opponent's winning cells.
+    """
+    wins, threats, playable = _tactics(board, piece)
+    if wins:
+        return WIN_SCORE, wins
+    forced = threats & playable
+    candidates = (forced or playable) & ~(threats >> 1)
+    if forced & (forced - 1) or not candidates:
+        return -WIN_SCORE, forced or playable
+    return None, candidates
+
+
+def _non_losing(board, moves, candidates):
+    """moves, in order, without those outside the candidates mask."""
+    column_masks = board.geometry.column_masks
+    return [col for col in moves if candidates & column_masks[col]]
+
+
+def _score_children(board, moves, piece, context):
+    """Score, for AI_PIECE, the position after each of moves by piece, in
+    one context.batch_evaluator call over the stacked child grids.
 
+    The children count as visited leaves. They must not end the game with
+    a win, which _precheck has ruled out by the time this is called.
+    """
+    count = len(moves)
+    context.nodes += count
+    context.leaves += count
+    if board.moves + 1 == board.geometry.cell_count:
+        return [0] * count  # The move fills the board: a tie
+    grids = np.repeat(board.board[np.newaxis], count, axis=0)
+    rows = [board.heights[col] for col in moves]
+    grids[np.arange(count), rows, moves] = piece
+    return context.batch_evaluator(grids, board.geometry.connect)
+
+
+def _best_child(board, moves, piece, sign, beta, depth, context):
+    """Score the children of a node one ply from the leaves in one
+    _score_children call and return (index, score) of the best of moves.
+
+    Scores are for AI_PIECE times sign, so piece maximizes them. A best
+    score of at least beta is recorded as a cutoff.
+    """
+    children = _score_children(board, moves, piece, context)
+    scores = [sign * int(score) for score in children]
+    index = scores.index(max(scores))
+    if scores[index] >= beta:
+        context.record_cutoff(board, moves[index], piece, depth, index)
+    return index, scores[index]
+
+
+def tactical_moves(board, piece):
+    """Return (wins, blocks, safe) for piece to move, as lists of columns.
+
+    wins are the moves that win at once, blocks the columns where the
+    opponent would win at once, and safe the moves that do not let the
+    opponent win by playing on top of them.
+    """
+    board = _as_board(board)
+    wins, threats, playable = _tactics(board, piece)
+    column_masks = board.geometry.column_masks
+    valid_locations = board.valid_locations()
+    return tuple(
+        [col for col in valid_locations if cells & column_masks[col]]
+        for cells in (wins, threats & playable, playable & ~(threats >> 1))
+    )
 
-def minimax(board, depth, alpha, beta, maximizing_player):
+
+def minimax(
+    board,
+    depth,
+    alpha,
+    beta,
+    maximizing_player,
+    table=None,
+    context=None,
+):
     """
     Minimax algorithm with Alpha-Beta pruning.
     Returns (column, score) tuple.
+
+    The context is set up for a search from this board, including the
+    incremental Evaluator that scores leaves and spots wins.
+
+    table is an optional TranspositionTable used to reuse results for
+    positions reached through different move orders. context carries that
+    table and a deadline through the recursion; passing one overrides table.
+
+    Children are searched in place with Evaluator.push/pop, so the board is
+    back in its original state when this returns. If the deadline passes,
+    SearchTimeout is raised and the caller has to unwind the board.
     """
-    valid_locations = get_valid_locations(board)
-    is_terminal = is_terminal_node(board)
-
-    if depth == 0 or is_terminal:
-        if is_terminal:
-            if check_win(board, AI_PIECE):
-                return (None, 100000000)
-            elif check_win(board, PLAYER_PIECE):
-                return (None, -100000000)
-            else:  # Tie
-                return (None, 0)
-        else:  # Depth is zero
-            return (None, score_position(board, AI_PIECE))
-
-    if maximizing_player:
-        value = -math.inf
-        best_col = random.choice(valid_locations)
-
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            new_board = drop_piece_copy(board, row, col, AI_PIECE)
-            new_score = minimax(new_board, depth - 1, alpha, beta, False)[1]
-
-            if new_score > value:
-                value = new_score
-                best_col = col
+    if context is None:
+        context = SearchContext(table)
+    board = _as_board(board)
+    context.start(board)
+    return _minimax(board, depth, alpha, beta, maximizing_player, context)
 
-            alpha = max(alpha, value)
-            if alpha >= beta:
-                break  # Beta cutoff
 
-        return best_col, value
+def _minimax(board, depth, alpha, beta, maximizing_player, context):
+    table = context.table
+    if context.nodes >= context.next_check:
+        context.check_budget()
+    context.nodes += 1
 
-    else:  # Minimizing player
-        value = math.inf
-        best_col = random.choice(valid_locations)
+    evaluator = context.evaluator
+    valid_locations = board.valid_locations()
 
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            new_board = drop_piece_copy(board, row, col, PLAYER_PIECE)
-            new_score = minimax(new_board, depth - 1, alpha, beta, True)[1]
+    # The evaluator tracks completed windows for both sides, so terminal
+    # positions and leaf scores come straight from its counts
+    if evaluator.lines:
+        return (None, WIN_SCORE)
+    elif evaluator.opp_lines:
+        return (None, -WIN_SCORE)
+    elif not valid_locations:  # Tie
+        return (None, 0)
+    elif depth == 0:
+        context.leaves += 1
+        return (None, evaluator.score)
 
-            if new_score < value:
-                value = new_score
-                best_col = col
+    # Immediate wins and forced losses need no search; otherwise only the
+    # moves that do not lose at once are searched
+    piece = AI_PIECE if maximizing_player else PLAYER_PIECE
+    score, cells = _precheck(board, piece)
+    if score is not None:
+        col = _cell_column(cells, board.geometry)
+        return col, score if maximizing_player else -score
+
+    tt_move = None
+    if table is not None:
+        key = board.hash ^ _MAXIMIZING_KEY if maximizing_player else board.hash
+        alpha_orig, beta_orig = alpha, beta
+        context.tt_probes += 1
+        entry = table.probe(key)
+        if entry is not None and entry[3] in valid_locations:
+            context.tt_hits += 1
+            entry_depth, entry_score, entry_flag, tt_move = entry
+            if entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return tt_move, entry_score
+                elif entry_flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return tt_move, entry_score
+
+    moves = context.order_moves(board, valid_locations, piece, tt_move)
+    moves = _non_losing(board, moves, cells)
+    best_col = moves[0]
+
+    if depth == 1 and context.batch_evaluator is not None:
+        # Score the whole frontier in one call rather than a search per child;
+        # the minimizing side maximizes the negated scores
+        sign, bound = (1, beta) if maximizing_player else (-1, -alpha)
+        index, value = _best_child(board, moves, piece, sign, bound, depth, context)
+        best_col, value = moves[index], sign * value
+    else:
+        if maximizing_player:
+            value = -math.inf
+
+            for index, col in enumerate(moves):
+                evaluator.push(col, AI_PIECE)
+                new_score = _minimax(board, depth - 1, alpha, beta, False, context)[1]
+                evaluator.pop()
+
+                if new_score > value:
+                    value = new_score
+                    best_col = col
+
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    context.record_cutoff(board, col, piece, depth, index)
+                    break  # Beta cutoff
+
+        else:  # Minimizing player
+            value = math.inf
+
+            for index, col in enumerate(moves):
+                evaluator.push(col, PLAYER_PIECE)
+                new_score = _minimax(board, depth - 1, alpha, beta, True, context)[1]
+                evaluator.pop()
+
+                if new_score < value:
+                    value = new_score
+                    best_col = col
+
+                beta = min(beta, value)
+                if alpha >= beta:
+                    context.record_cutoff(board, col, piece, depth, index)
+                    break  # Alpha cutoff
+
+    if table is not None:
+        if value <= alpha_orig:
+            flag = UPPER
+        elif value >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table.store(key, depth, value, flag, best_col)
+
+    return best_col, value
+
+
+def negamax(board, depth, alpha=-INFINITY, beta=INFINITY, piece=AI_PIECE, context=None):
+    """
+    Negamax search with principal variation search and late move reductions.
+    Returns (column, score) with the score from piece's point of view.
+
+    Only the first move at a node gets the full (alpha, beta) window; the
+    rest are searched with a null window and re-searched only if they beat
+    alpha. Late moves are first tried one ply shallower.
+    """
+    if context is None:
+        context = SearchContext(transposition_table)
+    board = _as_board(board)
+    context.start(board)
+    context.best_move = None
+    score = _negamax(board, depth, alpha, beta, piece, context)
+    return context.best_move, score
+
+
+def _negamax(board, depth, alpha, beta, piece, context):
+    if context.nodes >= context.next_check:
+        context.check_budget()
+    context.nodes += 1
+
+    evaluator = context.evaluator
+    if piece == AI_PIECE:
+        own_lines, opp_lines, sign = evaluator.lines, evaluator.opp_lines, 1
+        opp_piece = PLAYER_PIECE
+    else:
+        own_lines, opp_lines, sign = evaluator.opp_lines, evaluator.lines, -1
+        opp_piece = AI_PIECE
+
+    valid_locations = board.valid_locations()
+    if opp_lines:
+        return -WIN_SCORE
+    elif own_lines:
+        return WIN_SCORE
+    elif not valid_locations:  # Tie
+        return 0
+    elif depth == 0:
+        context.leaves += 1
+        return sign * evaluator.score
+
+    is_root = board.moves == context.root_moves
+    score, cells = _precheck(board, piece)
+    if score is not None:
+        if is_root:
+            context.best_move = _cell_column(cells, board.geometry)
+        return score
+
+    table = context.table
+    tt_move = None
+    alpha_orig = alpha
+    if table is not None:
+        key = board.hash ^ _NEGAMAX_KEYS[piece]
+        context.tt_probes += 1
+        entry = table.probe(key)
+        if entry is not None and entry[3] in valid_locations:
+            context.tt_hits += 1
+            entry_depth, entry_score, entry_flag, tt_move = entry
+            # The root always searches, so that it reports a best move
+            if entry_depth >= depth and not is_root:
+                if entry_flag == EXACT:
+                    return entry_score
+                elif entry_flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
 
-            beta = min(beta, value)
+    moves = context.order_moves(board, valid_locations, piece, tt_move)
+    moves = _non_losing(board, moves, cells)
+    killers = context.killers[board.moves - context.root_moves]
+    best_score = -INFINITY
+    best_col = moves[0]
+
+    if depth == 1 and context.batch_evaluator is not None:
+        # Score the whole frontier in one call rather than a search per child
+        index, best_score = _best_child(board, moves, piece, sign, beta, depth, context)
+        best_col = moves[index]
+    else:
+        for index, col in enumerate(moves):
+            evaluator.push(col, piece)
+            if index == 0:
+                score = -_negamax(board, depth - 1, -beta, -alpha, opp_piece, context)
+            else:
+                reduction = 0
+                if (
+                    context.late_move_reductions
+                    and index >= LMR_MIN_INDEX
+                    and depth >= LMR_MIN_DEPTH
+                    and col not in killers
+                ):
+                    reduction = 1
+                score = -_negamax(
+                    board, depth - 1 - reduction, -alpha - 1, -alpha, opp_piece, context
+                )
+                if score > alpha and reduction:
+                    score = -_negamax(
+                        board, depth - 1, -alpha - 1, -alpha, opp_piece, context
+                    )
+                if alpha < score < beta:
+                    score = -_negamax(
+                        board, depth - 1, -beta, -alpha, opp_piece, context
+                    )
+            evaluator.pop()
+
+            if score > best_score:
+                best_score = score
+                best_col = col
+            if score > alpha:
+                alpha = score
             if alpha >= beta:
-                break  # Alpha cutoff
+                context.record_cutoff(board, col, piece, depth, index)
+                break
+
+    if table is not None:
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table.store(key, depth, best_score, flag, best_col)
+    if is_root:
+        context.best_move = best_col
+
+    return best_score
+
+
+def _search_iteration(board, depth, previous_score, engine, context):
+    """Run one iterative-deepening iteration and return (column, score)."""
+    if engine == ENGINE_MINIMAX:
+        return minimax(board, depth, -math.inf, math.inf, True, context=context)
+
+    if previous_score is None or abs(previous_score) >= WIN_SCORE:
+        return negamax(board, depth, -INFINITY, INFINITY, AI_PIECE, context)
+
+    # Aspiration window around the last score; open up whichever side the
+    # result falls outside of and search again
+    alpha = previous_score - ASPIRATION_WINDOW
+    beta = previous_score + ASPIRATION_WINDOW
+    while True:
+        col, score = negamax(board, depth, alpha, beta, AI_PIECE, context)
+        if score <= alpha:
+            alpha = -INFINITY
+        elif score >= beta:
+            beta = INFINITY
+        else:
+            return col, score
+
 
-        return best_col, value
+class SearchStats:
+    """What one get_best_move call did, for tuning and monitoring.
 
+    source says where the move came from: "search", "book", "solver",
+    "forced" for a move the immediate tactics decided, or None if there was
+    no move to make.
 
-def get_best_move(board_obj):
+    nodes counts every node visited, solver nodes included; leaves the
+    static evaluations; cutoffs[i] the beta cutoffs caused by the i-th move
+    tried at a node. depth is the deepest completed iteration, with
+    iteration_nodes and iteration_times giving each iteration's share of
+    the work.
+    """
+
+    def __init__(self):
+        self.source = None
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = []
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.depth = 0
+        self.iteration_nodes = []
+        self.iteration_times = []
+        self.elapsed = 0.0
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def branching_factor(self):
+        """Effective branching factor: growth in nodes over the last
+        iteration, or None with fewer than two iterations."""
+        if len(self.iteration_nodes) < 2 or not self.iteration_nodes[-2]:
+            return None
+        return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+
+    def _begin(self, context, pool, solver):
+        self._counters = (context, pool, solver)
+        self._base = self._read()
+        self._started = self._last = time.perf_counter()
+
+    def _read(self):
+        context, pool, solver = self._counters
+        nodes = context.nodes
+        if pool is not None:
+            nodes += pool.nodes
+        if solver is not None:
+            nodes += solver.nodes
+        return (
+            nodes,
+            context.leaves,
+            context.tt_probes,
+            context.tt_hits,
+            list(context.cutoffs),
+        )
+
+    def _iteration_done(self, depth):
+        now = time.perf_counter()
+        nodes = self._read()[0] - self._base[0]
+        self.iteration_nodes.append(nodes - sum(self.iteration_nodes))
+        self.iteration_times.append(now - self._last)
+        self._last = now
+        self.depth = depth
+
+    def _finish(self):
+        nodes, leaves, probes, hits, cutoffs = self._read()
+        base_nodes, base_leaves, base_probes, base_hits, base_cutoffs = self._base
+        self.elapsed = time.perf_counter() - self._started
+        self.nodes = nodes - base_nodes
+        self.leaves = leaves - base_leaves
+        self.tt_probes = probes - base_probes
+        self.tt_hits = hits - base_hits
+        base_cutoffs = base_cutoffs + [0] * (len(cutoffs) - len(base_cutoffs))
+        self.cutoffs = [count - base for count, base in zip(cutoffs, base_cutoffs)]
+        del self._counters, self._base
+
+
+def get_best_move(
+    board_obj,
+    time_limit_ms=None,
+    max_depth=DEPTH,
+    context=None,
+    engine=ENGINE_NEGAMAX,
+    pool=None,
+    book=None,
+    solver=None,
+    endgame_cells=ENDGAME_CELLS,
+    with_stats=False,
+    stats_callback=None,
+    max_nodes=None,
+    book_moves=BOOK_MOVES,
+):
     """
     Public API: Get Pyoneer's best move.
     Takes a Board object and returns the best column to play.
+
+    The search deepens one ply at a time up to max_depth, each iteration
+    ordering its moves from the best moves the one before left in the
+    transposition table.
+
+    time_limit_ms stops the search when it runs out, and the best move of
+    the last completed iteration is played.
+
+    max_nodes caps the nodes searched the same way. Unlike time it does not
+    depend on the machine's speed, though what the table already holds
+    still changes where the cap falls. Both limits are checked every
+    CHECK_INTERVAL nodes. DIFFICULTY_LEVELS holds ready-made sets of them.
+
+    context is the SearchContext to search with; pass one to read its node
+    and cutoff counters afterwards.
+
+    engine picks the search: ENGINE_NEGAMAX (default) or the legacy
+    ENGINE_MINIMAX.
+
+    pool is a parallel.RootSplitSearch or LazySMPSearch that runs each
+    negamax iteration instead. It only keeps to the deadline, so passing
+    max_nodes as well raises ValueError. RootSplitSearch searches without
+    late move reductions by default, so its move can differ from the
+    serial search's.
+
+    book is a book.OpeningBook, consulted first in positions with fewer
+    than book_moves moves played; a move it knows is played without a
+    search.
+
+    solver is a solver.Solver that solves positions with at most
+    endgame_cells empty cells exactly, within ENDGAME_TIME_MS and at most
+    half of time_limit_ms. If it runs out, the normal search takes over.
+
+    Statistics are opt-in: with_stats=True returns (column, SearchStats),
+    and a stats_callback is called with the SearchStats of every move.
+    Without either, nothing beyond the context's counters is recorded.
     """
-    col, _ = minimax(board_obj.board, DEPTH, -math.inf, math.inf, True)
-    return col
+    if engine not in (ENGINE_NEGAMAX, ENGINE_MINIMAX):
+        raise ValueError(f"unknown engine {engine!r}")
+    if pool is not None and engine != ENGINE_NEGAMAX:
+        raise ValueError("a worker pool only runs the negamax engine")
+    if pool is not None and max_nodes is not None:
+        # The pool's searches only watch the deadline, not a node count
+        raise ValueError("a worker pool cannot enforce max_nodes")
+    if isinstance(board_obj, Board):
+        board = board_obj
+    else:
+        board = Board.from_grid(board_obj.board)
+    deadline = None
+    if time_limit_ms is not None:
+        deadline = time.perf_counter() + time_limit_ms / 1000
+    if context is None:
+        context = SearchContext(transposition_table)
+    context.set_budget(deadline, max_nodes)
+
+    options = dict(
+        deadline=deadline,
+        max_depth=max_depth,
+        context=context,
+        engine=engine,
+        pool=pool,
+        book=book,
+        book_moves=book_moves,
+        solver=solver,
+        endgame_cells=endgame_cells,
+    )
+    if not with_stats and stats_callback is None:
+        return _choose_move(board, stats=None, **options)
+    stats = SearchStats()
+    stats._begin(context, pool, solver)
+    col = _choose_move(board, stats=stats, **options)
+    stats._finish()
+    if stats_callback is not None:
+        stats_callback(stats)
+    return (col, stats) if with_stats else col
+
+
+def _choose_move(
+    board,
+    deadline,
+    max_depth,
+    context,
+    engine,
+    pool,
+    book,
+    book_moves,
+    solver,
+    endgame_cells,
+    stats,
+):
+    """The body of get_best_move, recording into stats when it is given."""
+    valid_locations = board.valid_locations()
+    if not valid_locations:
+        return None
+    # Book entries are for the side to move, which is the AI on odd plies
+    if book is not None and board.moves % 2 == 1 and board.moves < book_moves:
+        entry = book.lookup(board)
+        if entry is not None and entry[0] in valid_locations:
+            if stats is not None:
+                stats.source = "book"
+            return entry[0]
+
+    game_over = board.winning_move(PLAYER_PIECE) or board.winning_move(AI_PIECE)
+    if not game_over:
+        # A win, a forced block or the only move that does not lose at once
+        # is played without a search
+        wins, blocks, safe = tactical_moves(board, AI_PIECE)
+        forced = wins or blocks or (safe if len(safe) == 1 else None)
+        if forced:
+            if stats is not None:
+                stats.source = "forced"
+            return _center_first(tuple(forced), board.columns)[0]
+
+    if (
+        solver is not None
+        and not game_over
+        and board.geometry.cell_count - board.moves <= endgame_cells
+        and solver.supports(board.geometry)
+    ):
+        now = time.perf_counter()
+        solver.deadline = now + ENDGAME_TIME_MS / 1000
+        if deadline is not None:
+            # Leave the search half the time, in case the solver runs out
+            solver.deadline = min(solver.deadline, now + (deadline - now) / 2)
+        try:
+            col, _ = solver.best_move(board, AI_PIECE)
+            if stats is not None:
+                stats.source = "solver"
+            return col
+        except SearchTimeout:
+            pass
+
+    # Fallback if not even the first iteration finishes: the most central move
+    best_col = min(valid_locations, key=lambda col: abs(col - board.columns // 2))
+    history_length = len(board.history)
+    score = None
+    if stats is not None:
+        stats.source = "search"
+
+    # An iteration as deep as the empty cells already plays every line out
+    # to the end, so deeper ones would only repeat it
+    max_depth = min(max_depth, board.geometry.cell_count - board.moves)
+    for depth in range(1, max_depth + 1):
+        try:
+            if pool is not None:
+                first_move = best_col if depth > 1 else None
+                col, score = pool.search(board, depth, deadline, first_move)
+            else:
+                col, score = _search_iteration(board, depth, score, engine, context)
+        except SearchTimeout:
+            # Unwind the moves the interrupted search left on the board
+            while len(board.history) > history_length:
+                board.pop()
+            break
+        if col is None:
+            if stats is not None:
+                stats.source = None
+            return None  # The game is already over
+        best_col = col
+        if stats is not None:
+            stats._iteration_done(depth)
+        if abs(score) >= WIN_SCORE:
+            break  # Forced result found; deeper search cannot change it
+
+    return best_col
@@ -0,0 +1,150 @@
+"""
+Vectorized state for many simultaneous games.
+
+BoardBatch keeps N boards in one (N, rows, columns) array so that a move
+in every game, or a win check across all of them, is a single numpy call
+instead of N Board method calls. Semantics match Board: row 0 is the
+bottom, pieces are PLAYER_PIECE/AI_PIECE and PLAYER_PIECE moves first.
+"""
+
+import functools
+
+import numpy as np
+
+from ai import AI_PIECE, EMPTY, PLAYER_PIECE, score_positions
+from board import COLUMN_COUNT, ROW_COUNT, WINDOW_LENGTH, Board, get_geometry
+
+
+@functools.lru_cache(maxsize=None)
+def _column_tables(rows, column_bits):
+    """Cells and height for every possible column segment of a position key."""
+    column_cells = np.full((1 << column_bits, rows), EMPTY, dtype=np.int8)
+    column_heights = np.zeros(1 << column_bits, dtype=np.int16)
+    for segment in range(1, 1 << column_bits):
+        # The highest set bit is the marker sitting on top of the pieces
+        height = min(segment.bit_length() - 1, rows)
+        column_heights[segment] = height
+        for r in range(height):
+            column_cells[segment, r] = PLAYER_PIECE if segment >> r & 1 else AI_PIECE
+    return column_cells, column_heights
+
+
+class BoardBatch:
+    def __init__(
+        self, size, rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH
+    ):
+        self.geometry = get_geometry(rows, columns, connect)
+        self.grids = np.full((size, rows, columns), EMPTY, dtype=np.int8)
+        self.heights = np.zeros((size, columns), dtype=np.int16)
+        self.moves = np.zeros(size, dtype=np.int16)
+
+    @classmethod
+    def from_boards(cls, boards):
+        """Stack Board objects (all of the same variant) into a batch."""
+        geometry = boards[0].geometry
+        batch = cls(len(boards), geometry.rows, geometry.columns, geometry.connect)
+        for i, board in enumerate(boards):
+            batch.grids[i] = board.board
+            batch.heights[i] = board.heights
+            batch.moves[i] = board.moves
+        return batch
+
+    @classmethod
+    def from_keys(
+        cls, keys, rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH
+    ):
+        """Decode an array of Board.to_key() values in one pass."""
+        batch = cls(len(keys), rows, columns, connect)
+        column_bits = batch.geometry.column_bits
+        if batch.geometry.bit_count > 64 or column_bits > 16:
+            raise ValueError("position keys for this variant are not batched")
+
+        # Split every key into per-column segments and decode each segment
+        # through a table of all 2 ** column_bits possible columns
+        keys = np.asarray(keys, dtype=np.uint64)
+        column_mask = np.uint64((1 << column_bits) - 1)
+        segments = np.empty((len(keys), columns), dtype=np.intp)
+        for c in range(columns):
+            segments[:, c] = (keys >> np.uint64(c * column_bits)) & column_mask
+        column_cells, column_heights = _column_tables(rows, column_bits)
+
+        batch.grids[:] = column_cells[segments].transpose(0, 2, 1)
+        batch.heights[:] = column_heights[segments]
+        batch.moves[:] = batch.heights.sum(axis=1)
+        return batch
+
+    def to_keys(self):
+        """Board.to_key() for every game, as a uint64 array."""
+        geometry = self.geometry
+        if geometry.bit_count > 64:
+            raise ValueError("position keys for this variant do not fit in 64 bits")
+        weights = np.array(
+            [
+                [1 << geometry.bit_index(r, c) for c in range(geometry.columns)]
+                for r in range(geometry.rows)
+            ],
+            dtype=np.uint64,
+        )
+        flat_weights = weights.reshape(-1)
+        grids = self.grids.reshape(len(self.grids), -1)
+        ones = np.where(grids == PLAYER_PIECE, flat_weights, np.uint64(0))
+        mask = np.where(grids != EMPTY, flat_weights, np.uint64(0))
+        return (
+            np.bitwise_or.reduce(ones, axis=1)
+            + np.bitwise_or.reduce(mask, axis=1)
+            + np.uint64(geometry.bottom_mask)
+        )
+
+    def __len__(self):
+        return len(self.grids)
+
+    def board(self, index):
+        """Copy one game out of the batch as a Board."""
+        return Board.from_grid(self.grids[index], self.geometry.connect)
+
+    def current_pieces(self):
+        """Piece to move in every game, assuming PLAYER_PIECE moved first."""
+        return np.where(self.moves % 2 == 0, PLAYER_PIECE, AI_PIECE).astype(np.int8)
+
+    def drop(self, cols, pieces=None):
+        """Drop one piece per game and return the rows they landed on.
+
+        cols holds a column for every game; games with a negative column are
+        left untouched (their row is reported as -1). pieces defaults to the
+        side to move in each game. Dropping into a full column raises
+        ValueError and leaves the batch unchanged.
+        """
+        cols = np.asarray(cols)
+        active = np.flatnonzero(cols >= 0)
+        active_cols = cols[active]
+        rows = self.heights[active, active_cols]
+        if np.any(rows >= self.geometry.rows):
+            raise ValueError("cannot drop into a full column")
+
+        if pieces is None:
+            pieces = self.current_pieces()
+        pieces = np.broadcast_to(np.asarray(pieces, dtype=np.int8), cols.shape)
+
+        self.grids[active, rows, active_cols] = pieces[active]
+        self.heights[active, active_cols] += 1
+        self.moves[active] += 1
+
+        landed = np.full(cols.shape, -1, dtype=np.int16)
+        landed[active] = rows
+        return landed
+
+    def valid_mask(self):
+        """(N, columns) boolean array of columns that can take a piece."""
+        return self.heights < self.geometry.rows
+
+    def winning_mask(self, piece):
+        """(N,) boolean array of games where piece has a complete line."""
+        return self.geometry.winning_windows(self.grids, piece).any(axis=-1)
+
+    def scores(self, piece):
+        """(N,) array of score_position for every game, from piece's side."""
+        return score_positions(self.grids, piece, self.geometry.connect)
+
+    def tie_mask(self):
+        """(N,) boolean array of games whose board is full."""
+        return self.moves >= self.geometry.cell_count
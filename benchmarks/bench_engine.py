@@ -0,0 +1,247 @@
+"""
+Engine benchmark suite with regression baselines.
+
+Micro benchmarks time the hot helpers (win checks, window and position
+scoring, opening book lookups); macro benchmarks run full fixed-depth
+searches, with both engines and with negamax scoring its frontier in
+batches, on opening, middlegame and endgame positions. Every benchmark
+reports p50/p99 latency, nodes/s where it searches, and the peak and
+retained memory allocated by one call (measured separately under
+tracemalloc, so tracing does not skew the timings).
+
+Run from the project root:
+
+    PYTHONPATH=. python benchmarks/bench_engine.py
+    PYTHONPATH=. python benchmarks/bench_engine.py --output results.json
+    PYTHONPATH=. python benchmarks/bench_engine.py --baseline benchmarks/baseline.json
+
+With --baseline, any benchmark whose fastest run is more than --threshold
+(default 0.5, i.e. 50%) slower than the baseline's is reported and the
+script exits with status 1. The suite runs in --rounds interleaved rounds
+so that a stretch of slow machine time cannot cover every sample of one
+benchmark. Back-to-back runs on a single-core VM then mostly stay within
+15% of each other; on a machine busier than that, such as a shared CI
+runner, pass a wider --threshold.
+Refresh the stored baseline on the machine that runs the comparison with
+--output benchmarks/baseline.json.
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from ai import (
+    AI_PIECE,
+    SearchContext,
+    check_win,
+    minimax,
+    negamax,
+    score_leaves,
+    score_position,
+    score_positions,
+    score_window,
+)
+from board import Board
+from book import OpeningBook
+from tt import TranspositionTable
+from utils import resource_path
+
+POSITIONS = {
+    "opening": "",
+    "middlegame": "4453344523",
+    "endgame": "44444433333312255555526",
+}
+DEPTHS = range(3, 8)
+# Calls per sample of a micro benchmark, so each sample is long enough to time
+MICRO_BATCH = 1000
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    index = max(0, math.ceil(fraction * len(samples)) - 1)
+    return samples[index]
+
+
+def micro_benchmarks():
+    """Yield (name, function, setup) for the helpers called at every node."""
+    board = Board.from_moves(POSITIONS["middlegame"])
+    grid = board.board
+    window = [AI_PIECE, AI_PIECE, 0, AI_PIECE]
+    yield "check_win", lambda: check_win(board, AI_PIECE), None
+    yield "Board.winning_move", lambda: board.winning_move(AI_PIECE), None
+    yield "score_window", lambda: score_window(window, AI_PIECE), None
+    yield "score_position/grid", lambda: score_position(grid, AI_PIECE), None
+    yield "score_position/board", lambda: score_position(board, AI_PIECE), None
+    # One call for a node's seven children, as the batched frontier makes
+    children = np.repeat(grid[np.newaxis], 7, axis=0)
+    yield "score_positions/stack7", lambda: score_positions(children, AI_PIECE), None
+    book = OpeningBook(resource_path("assets/opening.book"))
+    opening = Board.from_moves("445")
+    yield "OpeningBook.lookup", lambda: book.lookup(opening), None
+
+
+def macro_benchmarks():
+    """Yield (name, function, setup) for fixed-depth searches. Each function
+    returns its node count; setup empties the table before every run."""
+
+    def search(engine, moves, depth):
+        board = Board.from_moves(moves)
+        table = TranspositionTable(size_mb=1)
+
+        def run():
+            context = SearchContext(table)
+            if engine == "negamax-batch":
+                context.batch_evaluator = score_leaves
+            if engine == "minimax":
+                minimax(board, depth, -math.inf, math.inf, True, context=context)
+            else:
+                negamax(board, depth, context=context)
+            return context.nodes
+
+        return run, table.clear
+
+    for engine in ("minimax", "negamax", "negamax-batch"):
+        for position, moves in POSITIONS.items():
+            for depth in DEPTHS:
+                yield f"{engine}/{position}/d{depth}", *search(engine, moves, depth)
+
+
+def measure(func, setup, min_time, max_runs):
+    """Time func repeatedly, calling setup (if any) untimed before each
+    call; return the per-call seconds and func's last value."""
+    samples = []
+    started = time.perf_counter()
+    result = None
+    while len(samples) < max_runs and (
+        len(samples) < 5 or time.perf_counter() - started < min_time
+    ):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def allocations(func, setup):
+    """Peak and retained bytes allocated by one call of func."""
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, retained
+
+
+def run_suite(min_time, macro=True, rounds=5):
+    benchmarks = []
+    for name, func, setup in micro_benchmarks():
+
+        def batched(call=func, batch=MICRO_BATCH):
+            for _ in range(batch):
+                call()
+
+        benchmarks.append((name, batched, setup, MICRO_BATCH))
+    if macro:
+        benchmarks += [(*benchmark, 1) for benchmark in macro_benchmarks()]
+
+    # The suite runs every benchmark once per round, so a stretch of slow
+    # machine time lands on a few samples of each rather than all of one
+    samples = {name: [] for name, *_ in benchmarks}
+    nodes = {}
+    for _ in range(rounds):
+        for name, func, setup, _ in benchmarks:
+            times, nodes[name] = measure(func, setup, min_time / rounds, 200 // rounds)
+            samples[name] += times
+
+    results = {}
+    for name, func, setup, batch in benchmarks:
+        record = summarize(sorted(samples[name]), nodes[name], batch)
+        record["alloc_peak_bytes"], record["alloc_retained_bytes"] = allocations(
+            func, setup
+        )
+        results[name] = record
+        print_row(name, record)
+    return results
+
+
+def summarize(samples, nodes, batch):
+    """Latency record for sorted samples of batch calls each."""
+    record = {
+        "min_us": samples[0] / batch * 1e6,
+        "p50_us": percentile(samples, 0.50) / batch * 1e6,
+        "p99_us": percentile(samples, 0.99) / batch * 1e6,
+        "runs": len(samples),
+    }
+    if isinstance(nodes, int):
+        record["nodes"] = nodes
+        record["nodes_per_sec"] = nodes / percentile(samples, 0.50)
+    return record
+
+
+def print_row(name, record):
+    nodes = ""
+    if "nodes" in record:
+        nodes = f"{record['nodes']:>8} nodes {record['nodes_per_sec']:>9.0f} n/s"
+    print(
+        f"{name:<28} p50 {record['p50_us']:>11.2f} us  p99 {record['p99_us']:>11.2f} us"
+        f"  {record['alloc_peak_bytes'] / 1024:>8.1f} KiB peak  {nodes}"
+    )
+
+
+def compare(results, baseline, threshold):
+    """Print how results moved against baseline; return the regressions."""
+    regressions = []
+    print(f"\nAgainst baseline (threshold {threshold:.0%}):")
+    for name, record in results.items():
+        if name not in baseline:
+            # New since the baseline was recorded, so nothing to compare
+            print(f"{name:<28} no baseline")
+            continue
+        ratio = record["min_us"] / baseline[name]["min_us"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Pyoneer engine.")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the suite")
+    parser.add_argument("--micro", action="store_true", help="skip the searches")
+    args = parser.parse_args()
+
+    results = run_suite(args.min_time, macro=not args.micro, rounds=args.rounds)
+    if args.output:
+        document = {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Check the move latency of every difficulty level.
+
+Plays seeded random games and asks each level of ai.DIFFICULTY_LEVELS
+for Pyoneer's move in every position along the way, with the opening
+book and endgame solver the game uses. Reports p50/p99/max latency and
+nodes per move against the level's time budget, and exits with status 1
+if any level's p99 goes over it by more than --tolerance: the search
+only reads the clock every ai.CHECK_INTERVAL nodes, so it can overrun
+its budget by a little.
+
+Run from the project root:
+
+    PYTHONPATH=. python benchmarks/bench_levels.py
+    PYTHONPATH=. python benchmarks/bench_levels.py --games 50 --seed 7
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+from ai import (
+    AI_PIECE,
+    DIFFICULTY_LEVELS,
+    PLAYER_PIECE,
+    SearchContext,
+    get_best_move,
+    negamax,
+)
+from board import Board
+from book import OpeningBook
+from solver import Solver
+from tt import TranspositionTable
+from utils import resource_path
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    index = max(0, math.ceil(fraction * len(samples)) - 1)
+    return samples[index]
+
+
+def sample_positions(games, seed, noise=0.3):
+    """Positions with Pyoneer to move from seeded games, in game order.
+
+    Both sides play a shallow search's move, except for a random move with
+    probability noise, so the games stay varied without being all blunders.
+    """
+    rng = random.Random(seed)
+    context = SearchContext(TranspositionTable(size_mb=1))
+    positions = []
+    for _ in range(games):
+        board = Board()
+        while board.valid_locations():
+            if board.moves % 2 == 1:
+                positions.append(board.copy())
+            if rng.random() < noise:
+                col = rng.choice(board.valid_locations())
+            else:
+                piece = AI_PIECE if board.moves % 2 == 1 else PLAYER_PIECE
+                col, _ = negamax(board, 3, piece=piece, context=context)
+            row = board.push(col)
+            if board.winning_move_at(row, col):
+                break
+    return positions
+
+
+def run_level(options, positions, book, solver):
+    """Time get_best_move on every position; return (latencies, nodes)."""
+    context = SearchContext(TranspositionTable(size_mb=16))
+    latencies, nodes = [], []
+    for board in positions:
+        before = context.nodes + solver.nodes
+        start = time.perf_counter()
+        get_best_move(board, context=context, book=book, solver=solver, **options)
+        latencies.append(time.perf_counter() - start)
+        nodes.append(context.nodes + solver.nodes - before)
+    return sorted(latencies), sorted(nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=20, help="random games to sample")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.05, help="allowed p99 overrun"
+    )
+    args = parser.parse_args()
+
+    positions = sample_positions(args.games, args.seed)
+    book = OpeningBook(resource_path("assets/opening.book"))
+    print(f"{len(positions)} positions from {args.games} games\n")
+    print(
+        f"{'level':<8} {'budget':>8} {'p50':>9} {'p99':>9} {'max':>9}"
+        f" {'p50 nodes':>10} {'max nodes':>10}"
+    )
+
+    over_budget = []
+    for name, options in DIFFICULTY_LEVELS.items():
+        latencies, nodes = run_level(options, positions, book, Solver())
+        budget = options.get("time_limit_ms")
+        p99 = percentile(latencies, 0.99) * 1000
+        flag = ""
+        if budget is not None and p99 > budget * (1 + args.tolerance):
+            over_budget.append(name)
+            flag = "  OVER BUDGET"
+        print(
+            f"{name:<8} {budget or '-':>6} ms"
+            f" {percentile(latencies, 0.5) * 1000:>6.1f} ms"
+            f" {p99:>6.1f} ms {latencies[-1] * 1000:>6.1f} ms"
+            f" {percentile(nodes, 0.5):>10} {nodes[-1]:>10}{flag}"
+        )
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare the serial search with the process pool and Lazy SMP threads.
+
+Run from the project root, once per interpreter build:
+
+    PYTHONPATH=. python benchmarks/bench_parallel.py
+    PYTHONPATH=. python3.13t benchmarks/bench_parallel.py
+
+Threads only run on separate cores on the free-threaded build; with the
+GIL they take turns, which this script reports.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import ai
+from ai import SearchContext, get_best_move
+from board import Board
+from parallel import LazySMPSearch, RootSplitSearch
+
+POSITIONS = {
+    "opening": "",
+    "middlegame": "4453344523",
+    "endgame": "44444433333312255555526",
+}
+
+
+def gil_enabled():
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else check()
+
+
+def time_search(name, moves, depth, pool=None):
+    board = Board.from_moves(moves)
+    context = SearchContext(ai.transposition_table)
+    ai.transposition_table.clear()
+    if isinstance(pool, LazySMPSearch):
+        pool.table.clear()
+    nodes = 0 if pool is None else pool.nodes
+    start = time.perf_counter()
+    col = get_best_move(board, max_depth=depth, context=context, pool=pool)
+    elapsed = time.perf_counter() - start
+    nodes = context.nodes if pool is None else pool.nodes - nodes
+    print(
+        f"{name:<22} {col + 1:>4} {elapsed * 1000:10.1f} ms "
+        f"{nodes:>9} nodes {nodes / elapsed:>10.0f} nodes/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=9)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(
+        f"Python {sys.version.split()[0]}, GIL {'on' if gil_enabled() else 'off'}, "
+        f"{os.cpu_count()} CPUs, {args.workers} workers, depth {args.depth}"
+    )
+    with RootSplitSearch(args.workers) as processes, LazySMPSearch(args.workers) as threads:
+        # Start the worker processes outside the timings
+        processes.search(Board(), 1)
+        for position, moves in POSITIONS.items():
+            print(f"\n{position} ({moves or 'empty board'})")
+            time_search("serial", moves, args.depth)
+            time_search("process pool", moves, args.depth, processes)
+            time_search("lazy SMP threads", moves, args.depth, threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare the vectorized window kernels against the original nested loops.
+
+Run from the project root:
+
+    PYTHONPATH=. python benchmarks/bench_windows.py
+"""
+
+import timeit
+
+import numpy as np
+
+from ai import AI_PIECE, PLAYER_PIECE, score_position, score_positions, score_window
+from board import COLUMN_COUNT, ROW_COUNT, WINDOW_LENGTH, get_geometry
+
+
+def loop_score_position(board, piece):
+    """The pre-vectorization score_position, kept here as the baseline."""
+    score = list(board[:, COLUMN_COUNT // 2]).count(piece) * 3
+    for r in range(ROW_COUNT):
+        row_array = list(board[r, :])
+        for c in range(COLUMN_COUNT - 3):
+            score += score_window(row_array[c : c + WINDOW_LENGTH], piece)
+    for c in range(COLUMN_COUNT):
+        col_array = list(board[:, c])
+        for r in range(ROW_COUNT - 3):
+            score += score_window(col_array[r : r + WINDOW_LENGTH], piece)
+    for r in range(ROW_COUNT - 3):
+        for c in range(COLUMN_COUNT - 3):
+            window = [board[r + i][c + i] for i in range(WINDOW_LENGTH)]
+            score += score_window(window, piece)
+    for r in range(3, ROW_COUNT):
+        for c in range(COLUMN_COUNT - 3):
+            window = [board[r - i][c + i] for i in range(WINDOW_LENGTH)]
+            score += score_window(window, piece)
+    return score
+
+
+def loop_winning_move(board, piece):
+    """The pre-bitboard cell-by-cell win check, kept here as the baseline."""
+    for c in range(COLUMN_COUNT - 3):
+        for r in range(ROW_COUNT):
+            if all(board[r][c + i] == piece for i in range(4)):
+                return True
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT - 3):
+            if all(board[r + i][c] == piece for i in range(4)):
+                return True
+    for c in range(COLUMN_COUNT - 3):
+        for r in range(ROW_COUNT - 3):
+            if all(board[r + i][c + i] == piece for i in range(4)):
+                return True
+    for c in range(COLUMN_COUNT - 3):
+        for r in range(3, ROW_COUNT):
+            if all(board[r - i][c + i] == piece for i in range(4)):
+                return True
+    return False
+
+
+def random_grids(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.choice([0, 0, PLAYER_PIECE, AI_PIECE], size=(count, ROW_COUNT, COLUMN_COUNT))
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    geometry = get_geometry()
+    grids = random_grids(1000).astype(np.float64)
+    grid = grids[0]
+
+    for g in grids[:200]:
+        assert score_position(g, AI_PIECE) == loop_score_position(g, AI_PIECE)
+        assert geometry.winning_windows(g, AI_PIECE).any() == loop_winning_move(g, AI_PIECE)
+
+    rows = [
+        ("score_position, loops", per_call_us(lambda: loop_score_position(grid, AI_PIECE), 200)),
+        ("score_position, vectorized", per_call_us(lambda: score_position(grid, AI_PIECE), 2000)),
+        (
+            "score_positions, 1000 boards / board",
+            per_call_us(lambda: score_positions(grids, AI_PIECE), 20) / len(grids),
+        ),
+        ("winning_move, loops", per_call_us(lambda: loop_winning_move(grid, AI_PIECE), 500)),
+        (
+            "winning_windows, 1000 boards / board",
+            per_call_us(lambda: geometry.winning_windows(grids, AI_PIECE).any(axis=-1), 50)
+            / len(grids),
+        ),
+    ]
+    for name, us in rows:
+        print(f"{name:<40} {us:10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,410 @@
+import functools
+import random
+
 import numpy as np
 
+# Default game: the classic 6x7 Connect 4. Every module sizes itself from
+# these, and Board accepts other values for larger Connect-N variants.
 ROW_COUNT = 6
 COLUMN_COUNT = 7
+WINDOW_LENGTH = 4
+
+# Move strings name columns with one character each, 1-based
+MOVE_CHARS = "123456789abcdefghijklmnopqrstuvwxyz"
+
+
+class Geometry:
+    """Precomputed tables for one (rows, columns, connect) variant.
+
+    Cells are stored column-major in plain Python ints: cell (r, c) is bit
+    c * column_bits + r. Every column gets one spare bit on top so that
+    shifted lines never wrap into the next column.
+    """
+
+    def __init__(self, rows, columns, connect):
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.column_bits = rows + 1
+        self.cell_count = rows * columns
+        self.bit_count = columns * self.column_bits
+        self.byte_count = (self.bit_count + 7) // 8
+
+        # Shift for each line direction: vertical, horizontal, "/" and "\"
+        self.directions = (
+            1,
+            self.column_bits,
+            self.column_bits + 1,
+            self.column_bits - 1,
+        )
+        # Shifts that collapse a run of `connect` bits onto its first bit,
+        # doubling the covered length at each step
+        self.line_shifts = tuple(
+            _run_shifts(shift, connect) for shift in self.directions
+        )
+        self.bottom_mask = sum(1 << (c * self.column_bits) for c in range(columns))
+        self.full_mask = self.bottom_mask * ((1 << rows) - 1)
+        self.column_masks = tuple(
+            ((1 << rows) - 1) << (c * self.column_bits) for c in range(columns)
+        )
+
+        self.windows = self._build_windows()
+        self.window_masks = tuple(
+            sum(1 << self.bit_index(r, c) for r, c in cells) for cells in self.windows
+        )
+        # Row-major flat cell indices of every window, for gathering all
+        # windows out of a grid in one numpy indexing operation
+        self.window_index = np.array(
+            [[r * columns + c for r, c in cells] for cells in self.windows],
+            dtype=np.intp,
+        ).reshape(len(self.windows), connect)
+
+        # For each cell, the masks and the indices of the windows through it
+        cell_windows = [[[] for _ in range(columns)] for _ in range(rows)]
+        cell_window_ids = [[[] for _ in range(columns)] for _ in range(rows)]
+        for window_id, (cells, mask) in enumerate(zip(self.windows, self.window_masks)):
+            for r, c in cells:
+                cell_windows[r][c].append(mask)
+                cell_window_ids[r][c].append(window_id)
+        self.cell_windows = tuple(
+            tuple(tuple(masks) for masks in row) for row in cell_windows
+        )
+        self.cell_window_ids = tuple(
+            tuple(tuple(ids) for ids in row) for row in cell_window_ids
+        )
+
+        # 64-bit Zobrist keys per piece and bit index, seeded from the
+        # variant so hashes are stable across runs and processes.
+        # mirror_keys[piece][i] is the key of the cell reflected left to
+        # right, so XORing those gives the hash of the mirrored position.
+        rng = random.Random(f"connect-py zobrist {rows}x{columns}/{connect}")
+        self.zobrist_keys = [[0] * self.bit_count] + [
+            [rng.getrandbits(64) for _ in range(self.bit_count)] for _ in range(2)
+        ]
+        self.mirror_keys = [
+            [keys[self.mirror_bit_index(i)] for i in range(self.bit_count)]
+            for keys in self.zobrist_keys
+        ]
+
+    def bit_index(self, row, col):
+        return col * self.column_bits + row
+
+    def mirror_bit_index(self, bit_index):
+        col, row = divmod(bit_index, self.column_bits)
+        return self.bit_index(row, self.columns - 1 - col)
+
+    def _build_windows(self):
+        """List every line of `connect` cells as a tuple of (row, col)."""
+        windows = []
+        # Horizontal, vertical, positive diagonal, negative diagonal
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+            for r in range(self.rows):
+                for c in range(self.columns):
+                    cells = tuple(
+                        (r + i * dr, c + i * dc) for i in range(self.connect)
+                    )
+                    if all(
+                        0 <= row < self.rows and 0 <= col < self.columns
+                        for row, col in cells
+                    ):
+                        windows.append(cells)
+        return tuple(windows)
+
+    def gather_windows(self, grids):
+        """Every window of grids (..., rows, columns) as (..., windows, connect).
+
+        Works for a single grid or a stack of them; one fancy-indexing call
+        replaces the per-direction loops over rows and columns.
+        """
+        grids = np.asarray(grids)
+        flat = grids.reshape(grids.shape[:-2] + (-1,))
+        return flat[..., self.window_index]
+
+    def winning_windows(self, grids, piece):
+        """Boolean (..., windows) array of windows completely filled by piece."""
+        return np.all(self.gather_windows(grids) == piece, axis=-1)
+
+    def has_line(self, bitboard):
+        """Check if a bitboard holds `connect` in a row in any direction."""
+        for shifts in self.line_shifts:
+            run = bitboard
+            for shift in shifts:
+                run &= run >> shift
+            if run:
+                return True
+        return False
+
+    def winning_cells(self, bitboard):
+        """Bitboard of the cells that would complete a line for bitboard.
+
+        Only empty cells are meaningful; mask out the occupied ones.
+        """
+        if self.connect == 4:
+            return self._winning_cells_4(bitboard)
+        cells = 0
+        for shift in self.directions:
+            # behind[i]: cells with i stones in a row behind them, ahead[i]
+            # the same in front; a gap with connect - 1 around it completes
+            behind = [self.full_mask]
+            ahead = [self.full_mask]
+            for i in range(1, self.connect):
+                behind.append(behind[-1] & (bitboard << (i * shift)))
+                ahead.append(ahead[-1] & (bitboard >> (i * shift)))
+            for i in range(self.connect):
+                cells |= behind[i] & ahead[self.connect - 1 - i]
+        return cells & self.full_mask
+
+    def _winning_cells_4(self, p):
+        """winning_cells unrolled for connect 4, the variant searched most."""
+        # Vertical: three stones right below (an empty cell has none above)
+        cells = (p << 1) & (p << 2) & (p << 3)
+        for shift in self.directions[1:]:
+            # Two stones behind, then the third behind or ahead of them
+            pair = (p << shift) & (p << 2 * shift)
+            cells |= pair & ((p << 3 * shift) | (p >> shift))
+            # Two stones ahead: the same pair moved three cells back
+            pair >>= 3 * shift
+            cells |= pair & ((p << shift) | (p >> 3 * shift))
+        return cells & self.full_mask
+
+    def bitboard_to_cells(self, bitboard):
+        """Unpack a bitboard into a rows x columns 0/1 array."""
+        raw = np.frombuffer(
+            bitboard.to_bytes(self.byte_count, "little"), dtype=np.uint8
+        )
+        bits = np.unpackbits(raw, bitorder="little")[: self.bit_count]
+        return bits.reshape(self.columns, self.column_bits)[:, : self.rows].T
+
+    def cells_to_bitboard(self, cells):
+        """Pack a rows x columns boolean array into a bitboard."""
+        padded = np.zeros((self.columns, self.column_bits), dtype=np.uint8)
+        padded[:, : self.rows] = np.asarray(cells, dtype=bool).T
+        packed = np.packbits(padded, bitorder="little").tobytes()
+        return int.from_bytes(packed, "little")
+
+
+def _run_shifts(shift, connect):
+    shifts = []
+    length = 1
+    while length * 2 <= connect:
+        shifts.append(length * shift)
+        length *= 2
+    if length < connect:
+        shifts.append((connect - length) * shift)
+    return tuple(shifts)
+
+
+@functools.lru_cache(maxsize=None)
+def get_geometry(rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH):
+    """Shared Geometry for a variant, built once per process."""
+    return Geometry(rows, columns, connect)
+
 
 class Board:
-    def __init__(self):
-        self.board = np.zeros((ROW_COUNT, COLUMN_COUNT))
+    def __init__(self, rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH):
+        self.geometry = get_geometry(rows, columns, connect)
+        # One bitboard per piece (index 0 is unused) plus the column heights
+        self.bitboards = [0, 0, 0]
+        self.heights = [0] * columns
+        self.moves = 0
+        # Zobrist hashes of this position and of its left-right mirror image
+        self.hash = 0
+        self.mirror_hash = 0
+        # (row, col, piece) of every drop, newest last, so pop() can undo
+        self.history = []
+        # Columns that still have room; only rebuilt when one fills up
+        self.valid_columns = tuple(range(columns))
+
+    @classmethod
+    def from_grid(cls, grid, connect=WINDOW_LENGTH):
+        """Build a Board from a rows x columns grid of 0/1/2."""
+        grid = np.asarray(grid)
+        rows, columns = grid.shape
+        board = cls(rows, columns, connect)
+        for piece in (1, 2):
+            board.bitboards[piece] = board.geometry.cells_to_bitboard(grid == piece)
+        occupied = grid != 0
+        for c in range(columns):
+            filled = np.flatnonzero(occupied[:, c])
+            board.heights[c] = int(filled[-1]) + 1 if filled.size else 0
+        board.moves = int(np.count_nonzero(occupied))
+        board._rehash()
+        board._update_valid_columns()
+        return board
+
+    @classmethod
+    def from_key(cls, key, rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH):
+        """Rebuild a Board from to_key(). The move history is not restored."""
+        board = cls(rows, columns, connect)
+        column_bits = board.geometry.column_bits
+        column_mask = (1 << column_bits) - 1
+        mask = 0
+        for c in range(columns):
+            height = ((key >> (c * column_bits)) & column_mask).bit_length() - 1
+            if height < 0:
+                raise ValueError(f"invalid position key {key:#x}")
+            board.heights[c] = height
+            board.moves += height
+            mask |= ((1 << height) - 1) << (c * column_bits)
+        board.bitboards[1] = key & mask
+        board.bitboards[2] = mask ^ board.bitboards[1]
+        board._rehash()
+        board._update_valid_columns()
+        return board
+
+    @classmethod
+    def from_moves(
+        cls, moves, rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH
+    ):
+        """Replay a move string such as "4453" (1-based columns, piece 1 first)."""
+        board = cls(rows, columns, connect)
+        for char in moves:
+            col = MOVE_CHARS.find(char)
+            if not 0 <= col < columns or not board.is_valid_location(col):
+                raise ValueError(f"illegal move {char!r} in {moves!r}")
+            board.push(col)
+        return board
+
+    @property
+    def rows(self):
+        return self.geometry.rows
+
+    @property
+    def columns(self):
+        return self.geometry.columns
+
+    @property
+    def board(self):
+        """The grid as a rows x columns array, row 0 at the bottom."""
+        cells = self.geometry.bitboard_to_cells(self.bitboards[1])
+        cells += 2 * self.geometry.bitboard_to_cells(self.bitboards[2])
+        return cells.astype(np.int8)
+
+    def copy(self):
+        new_board = Board.__new__(Board)
+        new_board.geometry = self.geometry
+        new_board.bitboards = self.bitboards[:]
+        new_board.heights = self.heights[:]
+        new_board.moves = self.moves
+        new_board.hash = self.hash
+        new_board.mirror_hash = self.mirror_hash
+        new_board.history = self.history[:]
+        new_board.valid_columns = self.valid_columns
+        return new_board
+
+    def _update_valid_columns(self):
+        heights = self.heights
+        rows = self.geometry.rows
+        self.valid_columns = tuple(
+            c for c in range(len(heights)) if heights[c] < rows
+        )
+
+    def _rehash(self):
+        """Recompute both Zobrist hashes from the bitboards."""
+        geometry = self.geometry
+        self.hash = self.mirror_hash = 0
+        for piece in (1, 2):
+            zobrist_keys = geometry.zobrist_keys[piece]
+            mirror_keys = geometry.mirror_keys[piece]
+            bitboard = self.bitboards[piece]
+            while bitboard:
+                low_bit = bitboard & -bitboard
+                bit_index = low_bit.bit_length() - 1
+                self.hash ^= zobrist_keys[bit_index]
+                self.mirror_hash ^= mirror_keys[bit_index]
+                bitboard ^= low_bit
+
+    def to_key(self):
+        """Pack the position into one int (49 bits for the 6x7 board).
+
+        Each column holds piece 1's cells plus a marker bit just above the
+        top piece, so the key is unique for any position reached by drops.
+        """
+        mask = self.bitboards[1] | self.bitboards[2]
+        return self.bitboards[1] + mask + self.geometry.bottom_mask
+
+    def to_moves(self):
+        """The move string that from_moves() replays into this position."""
+        if len(self.history) != self.moves:
+            raise ValueError("board was not built move by move")
+        return "".join(MOVE_CHARS[col] for _, col, _ in self.history)
+
+    def canonical_hash(self):
+        """Hash shared by a position and its mirror image."""
+        return min(self.hash, self.mirror_hash)
 
     def drop_piece(self, row, col, piece):
-        self.board[row][col] = piece
+        geometry = self.geometry
+        bit_index = col * geometry.column_bits + row
+        self.bitboards[piece] |= 1 << bit_index
+        self.hash ^= geometry.zobrist_keys[piece][bit_index]
+        self.mirror_hash ^= geometry.mirror_keys[piece][bit_index]
+        self.moves += 1
+        self.history.append((row, col, piece))
+        if row >= self.heights[col]:
+            self.heights[col] = row + 1
+            if row + 1 == geometry.rows:
+                self._update_valid_columns()
+
+    def push(self, col, piece=None):
+        """Drop a piece into col and return the row it landed on.
+
+        piece defaults to the side to move, assuming piece 1 moved first.
+        """
+        if piece is None:
+            piece = 1 if self.moves % 2 == 0 else 2
+        row = self.heights[col]
+        self.drop_piece(row, col, piece)
+        return row
+
+    def pop(self):
+        """Undo the most recent drop and return its (row, col)."""
+        geometry = self.geometry
+        row, col, piece = self.history.pop()
+        bit_index = col * geometry.column_bits + row
+        self.bitboards[piece] ^= 1 << bit_index
+        self.hash ^= geometry.zobrist_keys[piece][bit_index]
+        self.mirror_hash ^= geometry.mirror_keys[piece][bit_index]
+        self.moves -= 1
+        if self.heights[col] == row + 1:
+            self.heights[col] = row
+            if row + 1 == geometry.rows:
+                self._update_valid_columns()
+        return row, col
 
     def is_valid_location(self, col):
-        return self.board[ROW_COUNT - 1][col] == 0
+        return self.heights[col] < self.geometry.rows
+
+    def valid_locations(self):
+        """Columns that can still take a piece, as a shared tuple."""
+        return self.valid_columns
 
     def get_next_open_row(self, col):
-        for r in range(ROW_COUNT):
-            if self.board[r][col] == 0:
-                return r
+        row = self.heights[col]
+        if row < self.geometry.rows:
+            return row
 
     def print_board(self):
         print(np.flip(self.board, 0))
 
     def is_tie(self):
         # Check if board is full
-        return not np.any(self.board == 0)
+        return self.moves >= self.geometry.cell_count
 
     def winning_move(self, piece):
-        # Check horizontal locations for win
-        for c in range(COLUMN_COUNT - 3):
-            for r in range(ROW_COUNT):
-                if self.board[r][c] == piece and self.board[r][c+1] == piece and self.board[r][c+2] == piece and self.board[r][c+3] == piece:
-                    return True
-
-        # Check vertical locations for win
-        for c in range(COLUMN_COUNT):
-            for r in range(ROW_COUNT - 3):
-                if self.board[r][c] == piece and self.board[r+1][c] == piece and self.board[r+2][c] == piece and self.board[r+3][c] == piece:
-                    return True
-
-        # Check positively sloped diagonals
-        for c in range(COLUMN_COUNT - 3):
-            for r in range(ROW_COUNT - 3):
-                if self.board[r][c] == piece and self.board[r+1][c+1] == piece and self.board[r+2][c+2] == piece and self.board[r+3][c+3] == piece:
-                    return True
-
-        # Check negatively sloped diagonals
-        for c in range(COLUMN_COUNT - 3):
-            for r in range(3, ROW_COUNT):
-                if self.board[r][c] == piece and self.board[r-1][c+1] == piece and self.board[r-2][c+2] == piece and self.board[r-3][c+3] == piece:
-                    return True
+        return self.geometry.has_line(self.bitboards[piece])
+
+    def winning_move_at(self, row, col):
+        """Check if the piece at (row, col) completes a line.
+
+        Only the windows through that cell are looked at, so this is the
+        cheap check to run right after a piece has been dropped there.
+        """
+        geometry = self.geometry
+        bitboard = self.bitboards[1]
+        if not bitboard >> (col * geometry.column_bits + row) & 1:
+            bitboard = self.bitboards[2]
+        for mask in geometry.cell_windows[row][col]:
+            if bitboard & mask == mask:
+                return True
+        return False
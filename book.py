@@ -0,0 +1,196 @@
+"""
+Opening book for Pyoneer.
+
+The book is a file of fixed-size records sorted by position key: every
+position up to some ply with Pyoneer (the second player) to move, with
+the best move and its score, found by a deep search ahead of time.
+OpeningBook maps the file and binary searches it, so a lookup touches a
+handful of pages and opening the book costs nothing until the first
+lookup.
+
+Mirror images share one record, stored under the smaller of the two keys.
+
+Build a book from the project root with:
+
+    PYTHONPATH=. python book.py --ply 3 --depth 12 assets/opening.book
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+
+from ai import AI_PIECE, TT_SIZE_MB, WIN_SCORE, SearchContext, negamax
+from board import COLUMN_COUNT, ROW_COUNT, WINDOW_LENGTH, Board
+from tt import TranspositionTable
+
+MAGIC = b"C4BK"
+VERSION = 1
+# Magic, version, rows, columns, connect, ply, padding
+HEADER = struct.Struct("<4s5B3x")
+# Position key, best move, score for the side to move
+RECORD = struct.Struct("<Qbi")
+
+
+def mirror_key(key, columns, column_bits):
+    """The Board.to_key() of the position reflected left to right."""
+    column_mask = (1 << column_bits) - 1
+    mirrored = 0
+    for c in range(columns):
+        segment = (key >> (c * column_bits)) & column_mask
+        mirrored |= segment << ((columns - 1 - c) * column_bits)
+    return mirrored
+
+
+def canonical_key(board):
+    """Return (key, mirrored): the smaller of the two keys and whether it
+    belongs to the reflected position."""
+    key = board.to_key()
+    mirrored = mirror_key(key, board.columns, board.geometry.column_bits)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self._file = None
+        self._map = None
+        self._count = 0
+
+    def __len__(self):
+        self._open()
+        return self._count
+
+    def _open(self):
+        """Map the file on first use. A missing file is an empty book."""
+        if self.header is not None:
+            return
+        self.header = (0, 0, 0, 0)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= HEADER.size:
+            return
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, columns, connect, ply = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not an opening book")
+        self.header = (rows, columns, connect, ply)
+        self._count = (len(self._map) - HEADER.size) // RECORD.size
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self.header = self._file = self._map = None
+        self._count = 0
+
+    def lookup(self, board):
+        """Return (column, score) for the side to move, or None if the
+        position is not in the book."""
+        self._open()
+        rows, columns, connect, ply = self.header
+        if (board.rows, board.columns, board.geometry.connect) != (
+            rows,
+            columns,
+            connect,
+        ) or board.moves > ply:
+            return None
+
+        key, mirrored = canonical_key(board)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            found, move, score = RECORD.unpack_from(
+                self._map, HEADER.size + middle * RECORD.size
+            )
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return (columns - 1 - move if mirrored else move), score
+        return None
+
+
+def book_positions(ply, rows=ROW_COUNT, columns=COLUMN_COUNT, connect=WINDOW_LENGTH):
+    """Yield one Board per distinct unfinished position of at most ply
+    moves with AI_PIECE to move, mirror images counted once."""
+    seen = set()
+    frontier = [Board(rows, columns, connect)]
+    for _ in range(ply + 1):
+        next_frontier = []
+        for board in frontier:
+            key, _ = canonical_key(board)
+            if key in seen:
+                continue
+            seen.add(key)
+            # get_best_move only looks the AI's turns up
+            if board.moves % 2 == 1:
+                yield board
+            for col in board.valid_locations():
+                child = board.copy()
+                row = child.push(col)
+                if not child.winning_move_at(row, col) and not child.is_tie():
+                    next_frontier.append(child)
+        frontier = next_frontier
+
+
+def build_book(
+    path,
+    ply,
+    depth,
+    rows=ROW_COUNT,
+    columns=COLUMN_COUNT,
+    connect=WINDOW_LENGTH,
+    progress=None,
+):
+    """Search every position up to ply moves to depth and write the book.
+
+    progress, if given, is called with (positions done, board) after each
+    search. Returns the number of records written.
+    """
+    context = SearchContext(TranspositionTable(TT_SIZE_MB))
+    records = []
+    for board in book_positions(ply, rows, columns, connect):
+        # Deepen one ply at a time, as get_best_move does, so every
+        # iteration orders its moves from the one before
+        for iteration in range(1, depth + 1):
+            move, score = negamax(board, iteration, piece=AI_PIECE, context=context)
+            if abs(score) >= WIN_SCORE:
+                break
+        key, mirrored = canonical_key(board)
+        if mirrored:
+            move = columns - 1 - move
+        records.append((key, move, score))
+        if progress is not None:
+            progress(len(records), board)
+
+    records.sort()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, columns, connect, ply))
+        for record in records:
+            f.write(RECORD.pack(*record))
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Pyoneer opening book.")
+    parser.add_argument("output", help="book file to write")
+    parser.add_argument("--ply", type=int, default=3, help="deepest position, in moves")
+    parser.add_argument("--depth", type=int, default=12, help="search depth per position")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(done, board):
+        print(f"\r{done} positions, {time.perf_counter() - start:.0f}s", end="", flush=True)
+
+    count = build_book(args.output, args.ply, args.depth, progress=progress)
+    print(f"\nwrote {count} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,15 @@ os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 
 import math
 import sys
-import time
 
 import pygame
 
 import ai  # Import Pyoneer AI
 import sound  # Import sound module
 from board import Board
+from book import OpeningBook
+from ponder import Ponderer
+from solver import Solver
 from ui import (  # Import from ui.py
     BLACK,
     BLUE,
@@ -21,7 +23,9 @@ from ui import (  # Import from ui.py
     WIDTH,
     YELLOW,
     draw_board,
+    draw_difficulty_menu,
     draw_menu,
+    get_difficulty_choice,
     get_menu_choice,
 )
 from utils import resource_path
@@ -41,9 +45,16 @@ pygame.display.set_icon(icon)
 font_path = resource_path("assets/font.ttf")
 myfont = pygame.font.Font(font_path, 65)
 
+# Mapped on Pyoneer's first move, not at startup
+opening_book = OpeningBook(resource_path("assets/opening.book"))
+endgame_solver = Solver()
+
+DIFFICULTIES = list(ai.DIFFICULTY_LEVELS)
+NUMBER_KEYS = (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5)
+
 
 def show_menu():
-    """Display the menu and return the selected game mode."""
+    """Display the menu and return (vs_ai, difficulty) for the next game."""
     draw_menu(screen, font_path)
 
     while True:
@@ -53,26 +64,55 @@ def show_menu():
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_1:
-                    return False  # 2 Player mode
+                    return False, None  # 2 Player mode
                 elif event.key == pygame.K_2:
-                    return True  # vs Pyoneer AI
+                    return True, show_difficulty_menu()  # vs Pyoneer AI
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 choice = get_menu_choice(event.pos)
                 if choice == 1:
-                    return False  # 2 Player mode
+                    return False, None  # 2 Player mode
                 elif choice == 2:
-                    return True  # vs Pyoneer AI
+                    return True, show_difficulty_menu()  # vs Pyoneer AI
+
+
+def show_difficulty_menu():
+    """Display the difficulty menu and return the selected level's name."""
+    draw_difficulty_menu(screen, font_path, DIFFICULTIES)
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                sys.exit()
+
+            choice = None
+            if event.type == pygame.KEYDOWN and event.key in NUMBER_KEYS:
+                choice = NUMBER_KEYS.index(event.key) + 1
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                choice = get_difficulty_choice(event.pos, len(DIFFICULTIES))
+            if choice is not None and choice <= len(DIFFICULTIES):
+                return DIFFICULTIES[choice - 1]
 
 
-def run_game(vs_ai):
+def run_game(vs_ai, difficulty=None):
     """Run a single game. Returns when game is over and player clicks."""
     board_obj = Board()
     game_over = False
     turn = 0  # 0 for Player 1 (Blue), 1 for Player 2/Pyoneer (Yellow)
 
+    # The level's search limits, for Pyoneer's moves and for pondering; the
+    # level also decides whether the book and solver get used
+    search_options = {}
+    if difficulty is not None:
+        search_options = dict(ai.DIFFICULTY_LEVELS[difficulty])
+    search_options.update(book=opening_book, solver=endgame_solver)
+    # Searches the player's possible moves while they think
+    ponderer = Ponderer(**search_options)
+
     draw_board(screen, board_obj)
     sound.play_start_game_sound()
+    if vs_ai:
+        ponderer.start(board_obj)
 
     while True:
         for event in pygame.event.get():
@@ -81,6 +121,7 @@ def run_game(vs_ai):
 
             if event.type == pygame.MOUSEBUTTONDOWN and game_over:
                 # If game is over, a click returns to menu
+                ponderer.stop()
                 return
 
             if not game_over:
@@ -97,6 +138,20 @@ def run_game(vs_ai):
                         )
                     pygame.display.update()
 
+                if event.type == pygame.KEYDOWN and event.key in (
+                    pygame.K_u,
+                    pygame.K_BACKSPACE,
+                ):
+                    # Take back the last move (and Pyoneer's reply vs AI)
+                    undo_count = 2 if vs_ai else 1
+                    if len(board_obj.history) >= undo_count:
+                        for _ in range(undo_count):
+                            board_obj.pop()
+                        turn = (turn - undo_count) % 2
+                        draw_board(screen, board_obj)
+                        if vs_ai:
+                            ponderer.start(board_obj)
+
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     # Player's turn
                     if turn == 0 or not vs_ai:
@@ -111,7 +166,7 @@ def run_game(vs_ai):
                             if turn == 0:
                                 board_obj.drop_piece(row, col, 1)
                                 sound.play_drop_sound()
-                                if board_obj.winning_move(1):
+                                if board_obj.winning_move_at(row, col):
                                     label = myfont.render("Player 1 wins!!", 1, BLUE)
                                     screen.blit(label, (40, 10))
                                     game_over = True
@@ -119,7 +174,7 @@ def run_game(vs_ai):
                             else:
                                 board_obj.drop_piece(row, col, 2)
                                 sound.play_drop_sound()
-                                if board_obj.winning_move(2):
+                                if board_obj.winning_move_at(row, col):
                                     label = myfont.render("Player 2 wins!!", 1, YELLOW)
                                     screen.blit(label, (40, 10))
                                     game_over = True
@@ -139,6 +194,8 @@ def run_game(vs_ai):
                             sound.play_invalid_move_sound()
 
                         if game_over:
+                            # Nothing left to ponder once the player ends it
+                            ponderer.stop()
                             pygame.display.update()
 
         # Pyoneer AI's turn
@@ -146,17 +203,17 @@ def run_game(vs_ai):
             pygame.draw.rect(screen, BLACK, (0, 0, WIDTH, SQUARESIZE))
             pygame.display.update()
 
-            # Small delay so AI doesn't feel instant
-            time.sleep(0.5)
-
-            col = ai.get_best_move(board_obj)
+            # Usually answered from the pondering done on the player's time
+            col = ponderer.take(board_obj)
+            if col is None:
+                col = ai.get_best_move(board_obj, **search_options)
 
             if col is not None and board_obj.is_valid_location(col):
                 row = board_obj.get_next_open_row(col)
                 board_obj.drop_piece(row, col, 2)
                 sound.play_drop_sound()
 
-                if board_obj.winning_move(2):
+                if board_obj.winning_move_at(row, col):
                     label = myfont.render("Pyoneer wins!!", 1, ORANGE)
                     screen.blit(label, (40, 10))
                     game_over = True
@@ -174,10 +231,13 @@ def run_game(vs_ai):
                 turn = turn % 2
 
                 if game_over:
+                    ponderer.stop()
                     pygame.display.update()
+                else:
+                    ponderer.start(board_obj)
 
 
 # --- Main Loop ---
 while True:
-    vs_ai = show_menu()
-    run_game(vs_ai)
+    vs_ai, difficulty = show_menu()
+    run_game(vs_ai, difficulty)
@@ -0,0 +1,254 @@
+"""
+Parallel searches for Pyoneer.
+
+Both classes here plug into get_best_move(..., pool=...): each runs one
+iteration of the search at a time through search(board, depth, deadline,
+first_move).
+
+RootSplitSearch spreads the root moves of a negamax search over a pool of
+long-lived worker processes, each with its own transposition table.
+Positions travel to the workers as Board.to_key() integers. The best root
+score found so far lives in shared memory, so a root move that starts
+after another one finished is searched against that bound and can prune.
+
+The first root move is searched on its own before the others are handed
+out, as in principal variation search, so that every sibling starts with
+a real alpha. Late move reductions are off by default, since the
+serial search reduces root moves by where they fall in its move order;
+without them the result is the same move and score as a serial negamax
+search of the same depth with late_move_reductions off.
+
+LazySMPSearch runs several threads over the same root, at staggered
+depths, sharing one SharedTranspositionTable. The helpers' only job is to
+fill the table; the result is the main thread's. Threads avoid the cost of
+sending positions to other processes, and on a free-threaded build
+(python3.13t) they run on separate cores.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import (
+    FIRST_EXCEPTION,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from ai import (
+    AI_PIECE,
+    INFINITY,
+    PLAYER_PIECE,
+    TT_SIZE_MB,
+    SearchContext,
+    SearchTimeout,
+    negamax,
+    tactical_moves,
+    transposition_table,
+)
+from board import Board
+from tt import SharedTranspositionTable
+
+# Per-process state, set up by _init_worker
+_shared_alpha = None
+_context = None
+
+
+def _init_worker(shared_alpha, late_move_reductions):
+    global _shared_alpha, _context
+    _shared_alpha = shared_alpha
+    # Workers start from a fresh interpreter, so ai's own table is empty and
+    # private to this process
+    _context = SearchContext(transposition_table)
+    _context.late_move_reductions = late_move_reductions
+
+
+def _search_root_move(key, rows, columns, connect, col, depth, deadline):
+    """Score root move col for AI_PIECE in a worker. Returns (score, nodes).
+
+    deadline is a time.time() value, since perf_counter() readings are not
+    comparable between processes.
+    """
+    board = Board.from_key(key, rows, columns, connect)
+    board.push(col, AI_PIECE)
+    if deadline is None:
+        _context.deadline = None
+    else:
+        _context.deadline = time.perf_counter() + (deadline - time.time())
+
+    # Searching against alpha - 1 keeps a move that ties the best score
+    # exact, so ties can go to the earlier move as in the serial search
+    alpha = _shared_alpha.value
+    nodes = _context.nodes
+    _, score = negamax(
+        board, depth - 1, -INFINITY, -(alpha - 1), PLAYER_PIECE, _context
+    )
+    score = -score
+
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return score, _context.nodes - nodes
+
+
+class RootSplitSearch:
+    """A pool of worker processes that search root moves in parallel.
+
+    Only one search may run on a pool at a time. Close the pool when done,
+    or use it as a context manager. late_move_reductions=True makes the
+    workers reduce late moves below the root, which is faster but no
+    longer matches the serial search.
+    """
+
+    def __init__(self, workers=None, late_move_reductions=False):
+        # Workers start from a clean interpreter rather than a fork of this
+        # one, which may be running threads (the UI) and hold a warm table
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("forkserver")
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+        self.shared_alpha = mp_context.Value("q", -INFINITY)
+        self.executor = ProcessPoolExecutor(
+            workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(self.shared_alpha, late_move_reductions),
+        )
+        self.nodes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def search(self, board, depth, deadline=None, first_move=None):
+        """Search board to depth with AI_PIECE to move; returns (column, score).
+
+        deadline is a time.perf_counter() value, as in SearchContext. If any
+        root move runs out of time the whole search raises SearchTimeout.
+        first_move, typically the previous iteration's best move, is searched
+        first; the rest follow the serial search's root order.
+        """
+        context = SearchContext()
+        context.start(board)
+        evaluator = context.evaluator
+        valid_locations = board.valid_locations()
+        if depth < 1 or evaluator.lines or evaluator.opp_lines or not valid_locations:
+            return negamax(board, depth, context=context)
+        # Leave positions the immediate tactics settle to negamax, and hand
+        # out only the root moves it would search
+        wins, blocks, safe = tactical_moves(board, AI_PIECE)
+        candidates = [col for col in blocks or valid_locations if col in safe]
+        if wins or len(blocks) > 1 or not candidates:
+            return negamax(board, depth, context=context)
+        moves = context.order_moves(board, valid_locations, AI_PIECE, first_move)
+        moves = [col for col in moves if col in candidates]
+
+        wall_deadline = None
+        if deadline is not None:
+            wall_deadline = time.time() + (deadline - time.perf_counter())
+        key = board.to_key()
+        task = (key, board.rows, board.columns, board.geometry.connect)
+        with self.shared_alpha.get_lock():
+            self.shared_alpha.value = -INFINITY
+
+        first = self.executor.submit(
+            _search_root_move, *task, moves[0], depth, wall_deadline
+        )
+        futures = [first]
+        self._wait([first])
+        futures += [
+            self.executor.submit(_search_root_move, *task, col, depth, wall_deadline)
+            for col in moves[1:]
+        ]
+        self._wait(futures)
+
+        best_col, best_score = None, -INFINITY
+        for col, future in zip(moves, futures):
+            score, nodes = future.result()
+            self.nodes += nodes
+            # Moves that failed low scored strictly below the best, so the
+            # earliest move with the top score is the one the serial search plays
+            if score > best_score:
+                best_col, best_score = col, score
+        return best_col, best_score
+
+    def _wait(self, futures):
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            if future.exception() is not None:
+                for other in pending:
+                    other.cancel()
+                if isinstance(future.exception(), SearchTimeout):
+                    raise SearchTimeout
+                future.result()
+
+
+class LazySMPSearch:
+    """Threads that search the same root and share one transposition table.
+
+    Helper i searches one ply deeper than the main thread when i is odd,
+    so the helpers spread over two depths and leave entries the main
+    thread can use. Only one search may run at a time. Close the pool when
+    done, or use it as a context manager.
+    """
+
+    def __init__(self, threads=None, table=None):
+        if threads is None:
+            threads = os.cpu_count() or 1
+        if table is None:
+            table = SharedTranspositionTable(TT_SIZE_MB)
+        self.table = table
+        self.contexts = [SearchContext(table) for _ in range(threads)]
+        self.executor = ThreadPoolExecutor(threads - 1) if threads > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    @property
+    def nodes(self):
+        return sum(context.nodes for context in self.contexts)
+
+    def search(self, board, depth, deadline=None, first_move=None):
+        """Search board to depth with AI_PIECE to move; returns (column, score).
+
+        deadline is a time.perf_counter() value, as in SearchContext; the
+        main thread raises SearchTimeout when it passes. first_move is
+        accepted for get_best_move and ignored: the shared table already
+        holds the previous iteration's best move.
+        """
+        main, helpers = self.contexts[0], self.contexts[1:]
+        futures = []
+        for i, context in enumerate(helpers, 1):
+            context.deadline = deadline
+            futures.append(
+                self.executor.submit(
+                    self._help, board.copy(), depth + i % 2, context
+                )
+            )
+        main.deadline = deadline
+        try:
+            return negamax(board, depth, context=main)
+        finally:
+            # A deadline in the past stops the helpers at their next check
+            for context in helpers:
+                context.deadline = 0
+            wait(futures)
+
+    @staticmethod
+    def _help(board, depth, context):
+        try:
+            negamax(board, depth, context=context)
+        except SearchTimeout:
+            pass
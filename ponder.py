@@ -0,0 +1,114 @@
+"""
+Pondering: Pyoneer thinks on the player's time.
+
+After Pyoneer moves, Ponderer searches every reply the player could make,
+the most likely one first, in a background thread. When the player's move
+is one it already searched, take() hands back Pyoneer's answer at once.
+Either way the searches leave their results in the shared transposition
+table, so a search that still has to run starts warm.
+"""
+
+import threading
+
+from ai import (
+    DEPTH,
+    PLAYER_PIECE,
+    SearchContext,
+    SearchTimeout,
+    get_best_move,
+    negamax,
+    transposition_table,
+)
+
+# Depth of the search that guesses the player's most likely reply
+PREDICT_DEPTH = 4
+
+
+class Ponderer:
+    """Searches the player's replies in the background.
+
+    search_options (book, solver, engine, ...) are passed on to
+    get_best_move so that pondered answers match the ones it would give.
+    Only one position is pondered at a time; start() replaces it.
+    """
+
+    def __init__(self, max_depth=DEPTH, table=transposition_table, **search_options):
+        self.max_depth = max_depth
+        self.search_options = search_options
+        self.context = SearchContext(table)
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+        self._thread = None
+        self._stopping = False
+
+    def start(self, board):
+        """Stop any earlier pondering and start on board, player to move."""
+        self.stop()
+        self.results = {}
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._ponder, args=(board.copy(),), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop pondering and wait for the background thread to finish."""
+        self._stopping = True
+        solver = self.search_options.get("solver")
+        while self._thread is not None and self._thread.is_alive():
+            # get_best_move resets the deadlines when it starts a search,
+            # so keep moving them into the past until the thread is gone
+            self.context.deadline = 0
+            if solver is not None:
+                solver.deadline = 0
+            self._thread.join(0.001)
+        self._thread = None
+
+    def wait(self, timeout=None):
+        """Block until every reply has been pondered (or timeout passes)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def take(self, board):
+        """Stop pondering; return Pyoneer's move for board if it was
+        pondered, else None."""
+        self.stop()
+        col = self.results.get(board.to_key())
+        if col is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return col
+
+    def _ponder(self, board):
+        try:
+            replies = list(board.valid_locations())
+            # Guess the player's reply and ponder it first, free of the
+            # limits the last get_best_move call left on the context
+            self.context.set_budget()
+            guess, _ = negamax(
+                board, PREDICT_DEPTH, piece=PLAYER_PIECE, context=self.context
+            )
+            if guess in replies:
+                replies.remove(guess)
+                replies.insert(0, guess)
+
+            for col in replies:
+                if self._stopping:
+                    return
+                child = board.copy()
+                row = child.push(col, PLAYER_PIECE)
+                if child.winning_move_at(row, col) or child.is_tie():
+                    continue
+                move = get_best_move(
+                    child,
+                    max_depth=self.max_depth,
+                    context=self.context,
+                    **self.search_options,
+                )
+                if self._stopping:
+                    return  # The search was cut short; its move is a guess
+                self.results[child.to_key()] = move
+        except SearchTimeout:
+            pass
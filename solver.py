@@ -0,0 +1,189 @@
+"""
+Exact endgame solver for Pyoneer.
+
+Solver plays every line out to the end and proves whether the side to move
+wins, draws or loses, and how fast. It works on two integers only, the
+side to move's stones and the occupied mask, and narrows in on the exact
+score with null-window searches over a fixed-size cache of upper bounds.
+
+Scores count from the side to move: positive is a win, larger the sooner
+it comes; 0 is a draw; negative is a loss, more negative the sooner.
+outcome() turns a score into a result and a distance in plies.
+"""
+
+import time
+from array import array
+
+from ai import SearchTimeout
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# Bytes per cache entry: key and stored bound
+ENTRY_SIZE = 8 + 2
+
+
+class Solver:
+    def __init__(self, cache_mb=8):
+        self.cache_mb = cache_mb
+        self.cache_size = max(1, int(cache_mb * 1024 * 1024) // ENTRY_SIZE)
+        self.geometry = None
+        self.nodes = 0
+        # time.perf_counter() value after which solve() gives up
+        self.deadline = None
+
+    @staticmethod
+    def supports(geometry):
+        """Whether positions of this variant fit the cache's 64-bit keys."""
+        return geometry.bit_count < 64
+
+    def _use_geometry(self, geometry):
+        """Switch variants, which invalidates every cached bound."""
+        if geometry is self.geometry:
+            return
+        if not self.supports(geometry):
+            raise ValueError("positions of this variant do not fit the solver's cache")
+        self.geometry = geometry
+        # Added to stored bounds so that every bound is positive
+        self.bound_offset = geometry.cell_count // 2 + 1
+        self.column_masks = [
+            ((1 << geometry.rows) - 1) << (c * geometry.column_bits)
+            for c in range(geometry.columns)
+        ]
+        middle = (geometry.columns - 1) / 2
+        self.order = sorted(range(geometry.columns), key=lambda c: abs(c - middle))
+        self.clear()
+
+    def clear(self):
+        self.keys = array("Q", bytes(8 * self.cache_size))
+        # Upper bound plus bound_offset; 0 marks an empty slot
+        self.bounds = array("h", bytes(2 * self.cache_size))
+
+    def solve(self, board, piece):
+        """Exact score of board with piece to move."""
+        self._use_geometry(board.geometry)
+        current = board.bitboards[piece]
+        mask = board.bitboards[1] | board.bitboards[2]
+        return self._solve(current, mask, board.moves)
+
+    def best_move(self, board, piece):
+        """Return (column, score) of the best move for piece: the quickest
+        win, else a draw, else the slowest loss. The game must not be over."""
+        self._use_geometry(board.geometry)
+        geometry = self.geometry
+        current = board.bitboards[piece]
+        mask = board.bitboards[1] | board.bitboards[2]
+        best_col, best_score = None, None
+        for col in self.order:
+            if not board.is_valid_location(col):
+                continue
+            move = (mask + geometry.bottom_mask) & self.column_masks[col]
+            if geometry.has_line(current | move):
+                return col, (geometry.cell_count + 1 - board.moves) // 2
+            score = -self._solve(current ^ mask, mask | move, board.moves + 1)
+            if best_score is None or score > best_score:
+                best_col, best_score = col, score
+        return best_col, best_score
+
+    def outcome(self, score, moves):
+        """Return (result, distance) for a score in a position with moves
+        played: WIN, DRAW or LOSS for the side to move, and the number of
+        plies until the game is decided (None for a draw)."""
+        cell_count = self.geometry.cell_count
+        if score > 0:
+            own_moves = (cell_count + 1 - moves) // 2 + 1 - score
+            return WIN, 2 * own_moves - 1
+        elif score < 0:
+            opponent_moves = (cell_count - moves) // 2 + 1 + score
+            return LOSS, 2 * opponent_moves
+        return DRAW, None
+
+    def _solve(self, current, mask, moves):
+        geometry = self.geometry
+        cell_count = geometry.cell_count
+        possible = (mask + geometry.bottom_mask) & geometry.full_mask
+        if geometry.winning_cells(current) & possible:
+            return (cell_count + 1 - moves) // 2
+
+        # Binary search on the score with null windows, probing near zero
+        # first since most positions are decided by the sign alone
+        low = -((cell_count - moves) // 2)
+        high = (cell_count + 1 - moves) // 2
+        while low < high:
+            middle = low + (high - low) // 2
+            if middle <= 0 and int(low / 2) < middle:
+                middle = int(low / 2)
+            elif middle >= 0 and int(high / 2) > middle:
+                middle = int(high / 2)
+            score = self._negamax(current, mask, moves, middle, middle + 1)
+            if score <= middle:
+                high = score
+            else:
+                low = score
+        return low
+
+    def _negamax(self, current, mask, moves, alpha, beta):
+        """Fail-hard alpha-beta, for positions where the side to move has
+        no immediate win."""
+        self.nodes += 1
+        if (
+            self.deadline is not None
+            and not self.nodes & 1023
+            and time.perf_counter() > self.deadline
+        ):
+            raise SearchTimeout
+
+        geometry = self.geometry
+        full_mask = geometry.full_mask
+        cell_count = geometry.cell_count
+        opponent = current ^ mask
+        possible = (mask + geometry.bottom_mask) & full_mask
+
+        # Block the opponent's immediate wins, and never play right under one
+        threats = geometry.winning_cells(opponent) & ~mask
+        forced = possible & threats
+        if forced:
+            if forced & (forced - 1):
+                return -((cell_count - moves) // 2)  # Two threats: lost
+            possible = forced
+        possible &= ~(threats >> 1)
+        if not possible:
+            return -((cell_count - moves) // 2)
+        if moves >= cell_count - 2:
+            return 0  # Neither side can complete a line any more
+
+        lowest = -((cell_count - 2 - moves) // 2)
+        if alpha < lowest:
+            alpha = lowest
+            if alpha >= beta:
+                return alpha
+        highest = (cell_count - 1 - moves) // 2
+        key = current + mask
+        slot = key % self.cache_size
+        if self.bounds[slot] and self.keys[slot] == key:
+            highest = min(highest, self.bounds[slot] - self.bound_offset)
+        if beta > highest:
+            beta = highest
+            if alpha >= beta:
+                return beta
+
+        # Moves that create the most new threats first, center-out on ties
+        candidates = []
+        for col in self.order:
+            move = possible & self.column_masks[col]
+            if move:
+                threats_after = geometry.winning_cells(current | move) & ~(mask | move)
+                candidates.append((threats_after.bit_count(), move))
+        candidates.sort(key=lambda candidate: -candidate[0])
+
+        for _, move in candidates:
+            score = -self._negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.keys[slot] = key
+        self.bounds[slot] = alpha + self.bound_offset
+        return alpha
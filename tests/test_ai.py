@@ -1,3 +1,5 @@
+import itertools
+import time
 from unittest.mock import MagicMock
 
 import numpy as np
@@ -10,16 +12,25 @@ from ai import (
     EMPTY,
     PLAYER_PIECE,
     ROW_COUNT,
+    Evaluator,
+    SearchContext,
     check_win,
+    check_win_at,
     drop_piece_copy,
     get_best_move,
     get_next_open_row,
     get_valid_locations,
     is_terminal_node,
     minimax,
+    negamax,
     score_position,
+    score_positions,
     score_window,
+    score_windows,
+    tactical_moves,
 )
+from board import Board
+from tt import TranspositionTable
 
 
 def create_empty_board():
@@ -152,6 +163,22 @@ class TestCheckWin:
         assert check_win(board, AI_PIECE) is False
 
 
+class TestCheckWinAt:
+    def test_detects_win_through_last_piece(self):
+        board = create_empty_board()
+        for i in range(4):
+            board[i][i] = AI_PIECE
+        assert check_win_at(board, 3, 3) is True
+        assert check_win_at(board, 1, 1) is True
+
+    def test_ignores_wins_elsewhere_on_the_board(self):
+        board = create_empty_board()
+        for c in range(4):
+            board[0][c] = PLAYER_PIECE
+        board[1][0] = AI_PIECE
+        assert check_win_at(board, 1, 0) is False
+
+
 class TestIsTerminalNode:
     def test_empty_board_not_terminal(self):
         board = create_empty_board()
@@ -201,6 +228,16 @@ class TestScoreWindow:
         assert score_window(window, AI_PIECE) == 0
 
 
+    def test_vectorized_scores_match_every_window(self):
+        windows = np.array(list(itertools.product([EMPTY, PLAYER_PIECE, AI_PIECE], repeat=4)))
+        assert len(windows) == 81
+        for piece in (AI_PIECE, PLAYER_PIECE):
+            scores = score_windows(windows, piece)
+            assert list(scores) == [score_window(list(w), piece) for w in windows]
+        assert score_window([AI_PIECE, EMPTY, AI_PIECE, AI_PIECE], AI_PIECE) == 5
+        assert score_window([PLAYER_PIECE, EMPTY, PLAYER_PIECE, PLAYER_PIECE], AI_PIECE) == -4
+
+
 class TestScorePosition:
     def test_empty_board_scores_zero(self):
         board = create_empty_board()
@@ -213,6 +250,12 @@ class TestScorePosition:
         score = score_position(board, AI_PIECE)
         assert score > 0  # Center column should add points
 
+    def test_scores_larger_variant(self):
+        board = Board(rows=9, columns=10, connect=5)
+        for c in range(5):
+            board.drop_piece(0, c, AI_PIECE)
+        assert score_position(board, AI_PIECE) >= 100
+
     def test_winning_position_scores_high(self):
         board = create_empty_board()
         for c in range(4):
@@ -221,6 +264,47 @@ class TestScorePosition:
         assert score >= 100  # Should include the 100 for four in a row
 
 
+class TestScorePositions:
+    def test_batch_matches_single_board_scores(self):
+        rng = np.random.default_rng(0)
+        grids = rng.choice([EMPTY, PLAYER_PIECE, AI_PIECE], size=(20, ROW_COUNT, COLUMN_COUNT))
+        scores = score_positions(grids, AI_PIECE)
+        assert scores.shape == (20,)
+        for grid, score in zip(grids, scores):
+            assert score == score_position(grid, AI_PIECE)
+
+
+class TestEvaluator:
+    def test_tracks_score_position_through_push_and_pop(self):
+        board = Board.from_moves("44")
+        evaluator = Evaluator(board)
+        assert evaluator.score == score_position(board, AI_PIECE)
+
+        for col in (3, 2, 3, 4, 5, 3):
+            piece = PLAYER_PIECE if board.moves % 2 == 0 else AI_PIECE
+            evaluator.push(col, piece)
+            assert evaluator.score == score_position(board, AI_PIECE)
+
+        for _ in range(6):
+            evaluator.pop()
+            assert evaluator.score == score_position(board, AI_PIECE)
+        assert board.to_moves() == "44"
+
+    def test_counts_completed_lines_per_side(self):
+        board = Board()
+        evaluator = Evaluator(board)
+        for col in range(3):
+            evaluator.push(col, AI_PIECE)
+        assert evaluator.lines == 0
+
+        evaluator.push(3, AI_PIECE)
+        assert evaluator.lines == 1
+        assert evaluator.opp_lines == 0
+
+        evaluator.pop()
+        assert evaluator.lines == 0
+
+
 class TestMinimax:
     def test_blocks_opponent_winning_move(self):
         board = create_empty_board()
@@ -247,6 +331,29 @@ class TestMinimax:
         col, _ = minimax(board, 3, -float("inf"), float("inf"), True)
         assert col in get_valid_locations(board)
 
+    def test_search_leaves_board_unchanged(self):
+        board = Board()
+        board.push(3, PLAYER_PIECE)
+        before = board.board.copy()
+        minimax(board, 3, -float("inf"), float("inf"), True)
+        assert np.array_equal(board.board, before)
+        assert board.moves == 1
+        assert board.history == [(0, 3, PLAYER_PIECE)]
+
+    def test_transposition_table_keeps_search_result(self):
+        board = Board.from_moves("4453")
+        _, plain_score = minimax(board, 4, -float("inf"), float("inf"), True)
+        table = TranspositionTable(size_mb=1)
+        col, score = minimax(
+            board, 4, -float("inf"), float("inf"), True, table=table
+        )
+        assert score == plain_score
+        # A second search is answered from the table
+        assert minimax(board, 4, -float("inf"), float("inf"), True, table=table) == (
+            col,
+            score,
+        )
+
     def test_terminal_state_returns_none_column(self):
         board = create_empty_board()
         # Create a win for AI
@@ -257,6 +364,198 @@ class TestMinimax:
         assert score == 100000000  # AI win score
 
 
+class TestNegamax:
+    def test_matches_minimax_without_reductions(self):
+        for moves in ("", "4453", "44433352", "1234567712", "11223", "22334"):
+            board = Board.from_moves(moves)
+            for depth in range(1, 5):
+                context = SearchContext()
+                context.late_move_reductions = False
+                _, score = negamax(board, depth, context=context)
+                _, expected = minimax(board, depth, -float("inf"), float("inf"), True)
+                assert score == expected
+
+    def test_takes_winning_move(self):
+        # AI holds columns 2-4 on the bottom row; the player threatens column 1
+        board = Board.from_moves("1213147")
+        col, score = negamax(board, 3)
+        assert col == 4
+        assert score == ai.WIN_SCORE
+
+    def test_search_leaves_board_unchanged(self):
+        board = Board.from_moves("4453")
+        negamax(board, 5)
+        assert board.to_moves() == "4453"
+
+
+class TestBatchedFrontier:
+    @pytest.mark.parametrize("moves", ["", "4453", "44433352", "11223", "1234567712"])
+    def test_matches_search_of_each_child(self, moves):
+        board = Board.from_moves(moves)
+        for depth in range(1, 5):
+            context = SearchContext()
+            context.late_move_reductions = False
+            batched = SearchContext(batch_evaluator=ai.score_leaves)
+            batched.late_move_reductions = False
+            _, expected = negamax(board, depth, context=context)
+            assert negamax(board, depth, context=batched)[1] == expected
+            batched = SearchContext(batch_evaluator=ai.score_leaves)
+            _, score = minimax(
+                board, depth, -float("inf"), float("inf"), True, context=batched
+            )
+            assert score == expected
+            assert board.to_moves() == moves
+
+    def test_evaluator_gets_the_children_stacked(self):
+        board = Board.from_moves("4453")
+        calls = []
+
+        def evaluate(grids, connect):
+            calls.append(grids.copy())
+            return ai.score_leaves(grids, connect)
+
+        negamax(board, 1, context=SearchContext(batch_evaluator=evaluate))
+        assert len(calls) == 1
+        grids = calls[0]
+        assert grids.shape == (COLUMN_COUNT, ROW_COUNT, COLUMN_COUNT)
+        # Each child differs from the board by one AI piece
+        for grid in grids:
+            added = grid != board.board
+            assert np.count_nonzero(added) == 1
+            assert grid[added][0] == AI_PIECE
+
+    def test_learned_evaluator_hook_drives_the_search(self):
+        # An evaluator that only likes the leftmost column gets it played
+        def evaluate(grids, connect):
+            return [int(np.count_nonzero(grid[:, 0] == AI_PIECE)) for grid in grids]
+
+        context = SearchContext(batch_evaluator=evaluate)
+        col, _ = negamax(Board.from_moves("4453"), 1, context=context)
+        assert col == 0
+
+
+class TestTactics:
+    def test_tactical_moves(self):
+        # The player holds columns 4-6 on the bottom row, the AI the row above
+        board = Board.from_moves("445566")
+        wins, blocks, safe = tactical_moves(board, PLAYER_PIECE)
+        assert wins == [2, 6]
+        assert blocks == []
+        # Playing under the AI's threats at columns 3 and 7 hands them over
+        assert safe == [0, 1, 3, 4, 5]
+        assert tactical_moves(board, AI_PIECE)[1] == [2, 6]
+
+    def test_search_plays_only_the_block(self):
+        board = Board.from_moves("11223")
+        context = SearchContext()
+        col, _ = negamax(board, 4, context=context)
+        assert col == 3
+        # Every other root move is pruned without being searched
+        children = SearchContext()
+        board.push(3, AI_PIECE)
+        negamax(board, 3, piece=PLAYER_PIECE, context=children)
+        board.pop()
+        assert context.nodes == children.nodes + 1
+
+    def test_double_threat_is_lost_without_searching(self):
+        # The player's three on the bottom row is open at both ends
+        board = Board.from_moves("22334")
+        context = SearchContext()
+        col, score = negamax(board, 1, context=context)
+        assert score == -ai.WIN_SCORE
+        assert col in (0, 4)
+        assert context.nodes == 1
+
+    @pytest.mark.parametrize("moves, expected", [("1727172", 6), ("11223", 3)])
+    def test_forced_moves_are_played_without_a_search(self, moves, expected):
+        board = Board.from_moves(moves)
+        context = SearchContext()
+        col, stats = get_best_move(board, context=context, with_stats=True)
+        assert col == expected
+        assert stats.source == "forced"
+        assert context.nodes == 0
+
+
+class TestSearchStats:
+    def test_stats_describe_the_search(self):
+        board = Board.from_moves("4453")
+        context = SearchContext(TranspositionTable(size_mb=1))
+        col, stats = get_best_move(board, max_depth=6, context=context, with_stats=True)
+        assert col in board.valid_locations()
+        assert stats.source == "search"
+        assert stats.depth == 6
+        assert stats.nodes == context.nodes == sum(stats.iteration_nodes)
+        assert 0 < stats.leaves < stats.nodes
+        assert stats.cutoffs == context.cutoffs
+        assert 0 < stats.tt_hits <= stats.tt_probes
+        assert 0 < stats.tt_hit_rate <= 1
+        assert len(stats.iteration_times) == 6
+        assert stats.branching_factor > 0
+        assert stats.nodes_per_second > 0
+
+    def test_stats_cover_only_this_call(self):
+        context = SearchContext()
+        get_best_move(Board.from_moves("4453"), max_depth=4, context=context)
+        nodes = context.nodes
+        _, stats = get_best_move(
+            Board.from_moves("4453"), max_depth=4, context=context, with_stats=True
+        )
+        assert stats.nodes == context.nodes - nodes
+
+    def test_callback_receives_stats(self):
+        received = []
+        col = get_best_move(Board(), max_depth=3, stats_callback=received.append)
+        assert col in range(COLUMN_COUNT)
+        assert len(received) == 1
+        assert received[0].depth == 3
+
+    def test_finished_game_has_no_source(self):
+        col, stats = get_best_move(Board.from_moves("1212121"), with_stats=True)
+        assert col is None
+        assert stats.source is None
+        assert stats.depth == 0
+
+
+class TestMoveOrdering:
+    def test_static_order_is_center_out(self):
+        board = Board()
+        context = SearchContext()
+        context.start(board)
+        moves = context.order_moves(board, board.valid_locations(), AI_PIECE)
+        assert moves[0] == 3
+        assert set(moves[1:3]) == {2, 4}
+        assert set(moves[-2:]) == {0, 6}
+
+    def test_table_move_then_killers_come_first(self):
+        board = Board()
+        context = SearchContext()
+        context.start(board)
+        context.record_cutoff(board, 6, AI_PIECE, 1, 2)
+        context.record_cutoff(board, 0, AI_PIECE, 1, 3)
+
+        moves = context.order_moves(board, board.valid_locations(), AI_PIECE, 5)
+        assert moves[:3] == [5, 0, 6]
+        assert sorted(moves) == list(range(COLUMN_COUNT))
+        assert context.cutoffs[2] == 1
+        assert context.cutoffs[3] == 1
+
+    def test_search_counts_nodes_and_cutoffs(self):
+        board = Board.from_moves("4453")
+        context = SearchContext()
+        minimax(board, 4, -float("inf"), float("inf"), True, context=context)
+        assert context.nodes > 1
+        assert sum(context.cutoffs) > 0
+        # Most cutoffs should come from the first move tried
+        assert context.cutoffs[0] == max(context.cutoffs)
+
+    def test_search_is_deterministic(self):
+        board = Board.from_moves("4453")
+        results = {
+            minimax(board, 4, -float("inf"), float("inf"), True) for _ in range(3)
+        }
+        assert len(results) == 1
+
+
 class TestGetBestMove:
     def test_returns_valid_column(self):
         # Create a mock board object
@@ -284,3 +583,74 @@ class TestGetBestMove:
         board_obj.board[0][2] = PLAYER_PIECE
         col = get_best_move(board_obj)
         assert col == 3
+
+    def test_time_limit_returns_promptly_and_restores_board(self):
+        board = Board.from_moves("4453")
+        before = board.board.copy()
+        start = time.perf_counter()
+        col = get_best_move(board, time_limit_ms=50, max_depth=20)
+        assert time.perf_counter() - start < 1.0
+        assert col in board.valid_locations()
+        assert np.array_equal(board.board, before)
+        assert board.to_moves() == "4453"
+
+    def test_max_depth_limits_search(self):
+        board = Board.from_moves("4453")
+        assert get_best_move(board, max_depth=1) in board.valid_locations()
+
+    @pytest.mark.parametrize("engine", [ai.ENGINE_NEGAMAX, ai.ENGINE_MINIMAX])
+    def test_deepening_stops_at_the_end_of_the_game(self, engine):
+        # A drawn endgame: every iteration finishes at once, but none may go
+        # deeper than the 9 empty cells
+        board = Board.from_moves("376565715465237536174467111175444")
+        col, stats = get_best_move(
+            board, max_depth=200, engine=engine, context=SearchContext(), with_stats=True
+        )
+        assert col in board.valid_locations()
+        assert stats.depth == 9
+
+    def test_node_budget_limits_search(self):
+        board = Board.from_moves("4453")
+        moves = set()
+        for _ in range(2):
+            context = SearchContext()
+            col = get_best_move(board, max_depth=20, context=context, max_nodes=500)
+            moves.add(col)
+            assert context.nodes <= 500
+        # Unlike a time limit, a node budget gives the same move every time
+        assert len(moves) == 1
+        assert moves.pop() in board.valid_locations()
+        assert board.to_moves() == "4453"
+
+    def test_node_limit_raises_search_timeout(self):
+        context = SearchContext(node_limit=10)
+        with pytest.raises(ai.SearchTimeout):
+            negamax(Board(), 10, context=context)
+        assert context.nodes == 10
+
+    @pytest.mark.parametrize("level", list(ai.DIFFICULTY_LEVELS))
+    def test_difficulty_levels(self, level):
+        board = Board.from_moves("4453")
+        options = ai.DIFFICULTY_LEVELS[level]
+        context = SearchContext()
+        start = time.perf_counter()
+        col = get_best_move(board, context=context, **options)
+        assert time.perf_counter() - start < 2 * options["time_limit_ms"] / 1000
+        assert context.nodes <= options["max_nodes"]
+        assert col in board.valid_locations()
+
+    def test_engines_agree_on_forced_moves(self):
+        for engine in (ai.ENGINE_NEGAMAX, ai.ENGINE_MINIMAX):
+            assert get_best_move(Board.from_moves("112233"), engine=engine) == 3
+            assert get_best_move(Board.from_moves("1213145"), engine=engine) == 0
+
+    def test_unknown_engine_is_rejected(self):
+        with pytest.raises(ValueError):
+            get_best_move(Board(), engine="mcts")
+
+    def test_finished_game_has_no_move(self):
+        board_obj = MagicMock()
+        board_obj.board = create_empty_board()
+        for c in range(4):
+            board_obj.board[0][c] = PLAYER_PIECE
+        assert get_best_move(board_obj) is None
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from ai import AI_PIECE, PLAYER_PIECE
+from batch import BoardBatch
+from board import COLUMN_COUNT, ROW_COUNT, Board
+
+
+def test_new_batch_is_empty():
+    batch = BoardBatch(5)
+    assert len(batch) == 5
+    assert batch.grids.shape == (5, ROW_COUNT, COLUMN_COUNT)
+    assert batch.valid_mask().all()
+    assert not batch.tie_mask().any()
+    assert not batch.winning_mask(PLAYER_PIECE).any()
+
+
+def test_drop_matches_board_semantics():
+    batch = BoardBatch(3)
+    boards = [Board() for _ in range(3)]
+    rng = np.random.default_rng(0)
+
+    for _ in range(12):
+        cols = rng.integers(0, COLUMN_COUNT, size=3)
+        cols = np.where(batch.valid_mask()[np.arange(3), cols], cols, -1)
+        batch.drop(cols)
+        for board, col in zip(boards, cols):
+            if col >= 0:
+                board.push(int(col))
+
+    for i, board in enumerate(boards):
+        assert np.array_equal(batch.grids[i], board.board)
+        assert np.array_equal(batch.board(i).board, board.board)
+        assert list(batch.heights[i]) == board.heights
+        assert batch.moves[i] == board.moves
+
+
+def test_drop_skips_negative_columns():
+    batch = BoardBatch(2)
+    rows = batch.drop([3, -1])
+    assert list(rows) == [0, -1]
+    assert batch.grids[0, 0, 3] == PLAYER_PIECE
+    assert not batch.grids[1].any()
+    assert list(batch.current_pieces()) == [AI_PIECE, PLAYER_PIECE]
+
+
+def test_drop_into_full_column_raises():
+    batch = BoardBatch(1)
+    for _ in range(ROW_COUNT):
+        batch.drop([0])
+    assert not batch.valid_mask()[0, 0]
+    with pytest.raises(ValueError):
+        batch.drop([0])
+
+
+def test_winning_mask_per_game():
+    batch = BoardBatch(3)
+    for c in range(4):
+        batch.drop([c, c, -1], pieces=[PLAYER_PIECE, AI_PIECE, PLAYER_PIECE])
+    assert list(batch.winning_mask(PLAYER_PIECE)) == [True, False, False]
+    assert list(batch.winning_mask(AI_PIECE)) == [False, True, False]
+
+
+def test_tie_mask_on_full_board():
+    full = Board()
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT):
+            full.drop_piece(r, c, 1 if (r + c) % 2 == 0 else 2)
+    batch = BoardBatch.from_boards([full, Board()])
+    assert list(batch.tie_mask()) == [True, False]
+    assert not batch.valid_mask()[0].any()
+
+
+def test_keys_round_trip_through_batch():
+    boards = [Board.from_moves(moves) for moves in ("", "4", "4453", "1111112222")]
+    batch = BoardBatch.from_boards(boards)
+
+    keys = batch.to_keys()
+    assert [int(key) for key in keys] == [board.to_key() for board in boards]
+
+    restored = BoardBatch.from_keys(keys)
+    assert np.array_equal(restored.grids, batch.grids)
+    assert np.array_equal(restored.heights, batch.heights)
+    assert np.array_equal(restored.moves, batch.moves)
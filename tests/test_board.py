@@ -145,3 +145,167 @@ def test_is_tie():
             board.drop_piece(r, c, 1)
             
     assert board.is_tie()
+
+def test_from_grid_round_trip():
+    grid = np.zeros((ROW_COUNT, COLUMN_COUNT))
+    grid[0][0] = 1
+    grid[1][0] = 2
+    grid[0][3] = 2
+
+    board = Board.from_grid(grid)
+
+    assert np.array_equal(board.board, grid)
+    assert board.get_next_open_row(0) == 2
+    assert board.get_next_open_row(3) == 1
+    assert board.get_next_open_row(6) == 0
+
+def test_copy_is_independent():
+    board = Board()
+    board.drop_piece(0, 0, 1)
+
+    clone = board.copy()
+    clone.drop_piece(1, 0, 2)
+
+    assert board.board[1][0] == 0
+    assert board.get_next_open_row(0) == 1
+    assert clone.board[1][0] == 2
+
+def test_winning_move_at_only_counts_lines_through_cell():
+    board = Board()
+    for c in range(4):
+        board.drop_piece(0, c, 1)
+    board.drop_piece(1, 0, 2)
+
+    assert board.winning_move_at(0, 3)
+    assert board.winning_move_at(0, 0)
+    assert not board.winning_move_at(1, 0)
+    # Empty cells never win
+    assert not board.winning_move_at(0, 5)
+
+def test_valid_locations_tracks_full_columns():
+    board = Board()
+    assert board.valid_locations() == tuple(range(COLUMN_COUNT))
+
+    for r in range(ROW_COUNT):
+        board.drop_piece(r, 2, 1 + r % 2)
+
+    assert board.moves == ROW_COUNT
+    assert 2 not in board.valid_locations()
+    assert len(board.valid_locations()) == COLUMN_COUNT - 1
+    assert board.get_next_open_row(2) is None
+
+def test_push_alternates_pieces_and_pop_undoes():
+    board = Board()
+    assert board.push(3) == 0
+    assert board.push(3) == 1
+    assert board.board[0][3] == 1
+    assert board.board[1][3] == 2
+
+    assert board.pop() == (1, 3)
+    assert board.board[1][3] == 0
+    assert board.get_next_open_row(3) == 1
+    assert board.moves == 1
+
+def test_pop_reopens_full_column():
+    board = Board()
+    for _ in range(ROW_COUNT):
+        board.push(0)
+    assert not board.is_valid_location(0)
+
+    board.pop()
+    assert board.is_valid_location(0)
+    assert 0 in board.valid_locations()
+
+def test_zobrist_hash_is_incremental_and_undone_by_pop():
+    board = Board()
+    assert board.hash == 0
+
+    board.push(1)
+    board.push(4)
+    after_two = board.hash
+    assert after_two != 0
+
+    # Same position reached by building the grid directly
+    assert Board.from_grid(board.board).hash == after_two
+
+    board.push(2)
+    board.pop()
+    assert board.hash == after_two
+    board.pop()
+    board.pop()
+    assert board.hash == 0
+
+def test_mirror_hash_matches_reflected_position():
+    board = Board()
+    for col in (0, 1, 1, 5):
+        board.push(col)
+
+    mirrored = Board.from_grid(np.fliplr(board.board))
+
+    assert board.mirror_hash == mirrored.hash
+    assert board.hash == mirrored.mirror_hash
+    assert board.canonical_hash() == mirrored.canonical_hash()
+
+def test_connect_five_variant():
+    board = Board(rows=9, columns=10, connect=5)
+    assert board.board.shape == (9, 10)
+    assert board.valid_locations() == tuple(range(10))
+
+    for c in range(4):
+        board.drop_piece(0, c, 1)
+    assert not board.winning_move(1)
+
+    board.drop_piece(0, 4, 1)
+    assert board.winning_move(1)
+    assert board.winning_move_at(0, 4)
+
+def test_large_board_vertical_line_does_not_wrap_columns():
+    board = Board(rows=20, columns=20, connect=5)
+    # Three at the top of column 0 and two at the bottom of column 1 are
+    # adjacent bits only if columns were packed without a spare bit
+    for r in range(17, 20):
+        board.drop_piece(r, 0, 1)
+    for r in range(2):
+        board.drop_piece(r, 1, 1)
+    assert not board.winning_move(1)
+
+def test_winning_windows_on_grid_stack():
+    geometry = Board().geometry
+    grids = np.zeros((2, ROW_COUNT, COLUMN_COUNT))
+    grids[1, 2:6, 4] = 2
+
+    assert geometry.gather_windows(grids).shape == (2, len(geometry.windows), 4)
+    flags = geometry.winning_windows(grids, 2)
+    assert not flags[0].any()
+    assert flags[1].sum() == 1
+
+def test_key_round_trip():
+    board = Board.from_moves("4453261")
+    key = board.to_key()
+    assert key < 1 << 49
+
+    restored = Board.from_key(key)
+    assert np.array_equal(restored.board, board.board)
+    assert restored.heights == board.heights
+    assert restored.moves == board.moves
+    assert restored.hash == board.hash
+    assert Board().to_key() != Board.from_moves("1").to_key()
+
+def test_moves_round_trip():
+    board = Board.from_moves("4453")
+    assert board.board[0][3] == 1
+    assert board.board[1][3] == 2
+    assert board.board[0][4] == 1
+    assert board.board[0][2] == 2
+    assert board.to_moves() == "4453"
+
+def test_from_moves_rejects_illegal_moves():
+    with pytest.raises(ValueError):
+        Board.from_moves("48")
+    with pytest.raises(ValueError):
+        Board.from_moves("1111111")
+
+def test_to_moves_needs_history():
+    board = Board.from_key(Board.from_moves("12").to_key())
+    with pytest.raises(ValueError):
+        board.to_moves()
@@ -0,0 +1,83 @@
+import pytest
+
+from ai import AI_PIECE, SearchContext, get_best_move, negamax
+from board import Board
+from book import OpeningBook, book_positions, build_book, canonical_key, mirror_key
+
+
+@pytest.fixture(scope="module")
+def book(tmp_path_factory):
+    path = tmp_path_factory.mktemp("book") / "test.book"
+    # Shallow enough that no late move gets reduced, so every score is exact
+    # whatever the earlier searches left in the table
+    build_book(path, ply=3, depth=2)
+    book = OpeningBook(path)
+    yield book
+    book.close()
+
+
+def test_mirror_key_reflects_columns():
+    board = Board.from_moves("1126")
+    mirrored = Board.from_moves("7762")
+    geometry = board.geometry
+    assert mirror_key(board.to_key(), 7, geometry.column_bits) == mirrored.to_key()
+    assert canonical_key(board)[0] == canonical_key(mirrored)[0]
+
+
+def test_positions_are_distinct_up_to_mirroring():
+    boards = list(book_positions(3))
+    # 4 first moves and 121 third moves, transpositions and mirrors merged
+    assert len(boards) == 4 + 121
+    assert len({canonical_key(board)[0] for board in boards}) == len(boards)
+
+
+def test_positions_have_the_ai_to_move():
+    # get_best_move only looks the book up on the AI's turns
+    assert all(board.moves % 2 == 1 for board in book_positions(3))
+    assert len(list(book_positions(2))) == 4
+
+
+def test_lookup_matches_search(book):
+    assert len(book) == len(list(book_positions(3)))
+    for moves in ("4", "7", "445", "123", "765"):
+        board = Board.from_moves(moves)
+        context = SearchContext()
+        for depth in range(1, 3):
+            _, expected = negamax(board, depth, piece=AI_PIECE, context=context)
+        col, score = book.lookup(board)
+        assert score == expected
+        assert col in board.valid_locations()
+
+
+def test_mirrored_positions_get_mirrored_moves(book):
+    col, score = book.lookup(Board.from_moves("125"))
+    assert book.lookup(Board.from_moves("763")) == (6 - col, score)
+
+
+def test_unknown_positions_miss(book, tmp_path):
+    assert book.lookup(Board.from_moves("4444")) is None
+    # The player's turns are left out
+    assert book.lookup(Board()) is None
+    assert book.lookup(Board.from_moves("12")) is None
+    assert book.lookup(Board(6, 8)) is None
+    assert OpeningBook(tmp_path / "missing.book").lookup(Board()) is None
+
+
+def test_get_best_move_plays_book_move(book):
+    board = Board.from_moves("4")
+    col, _ = book.lookup(board)
+    context = SearchContext()
+    assert get_best_move(board, book=book, context=context) == col
+    assert context.nodes == 0
+    # The player's turns are not looked up for the AI
+    assert get_best_move(Board.from_moves("44"), book=book, max_depth=1) is not None
+
+
+def test_book_moves_limits_lookups(book):
+    board = Board.from_moves("445")
+    context = SearchContext()
+    get_best_move(board, book=book, book_moves=3, max_depth=2, context=context)
+    assert context.nodes > 0
+    context = SearchContext()
+    get_best_move(board, book=book, book_moves=4, context=context)
+    assert context.nodes == 0
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from ai import SearchContext, get_best_move, negamax
+from board import Board
+from parallel import LazySMPSearch, RootSplitSearch
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with RootSplitSearch(workers=2) as pool:
+        yield pool
+
+
+@pytest.mark.parametrize("moves", ["", "4453", "44433352", "1234567712", "3", "11223", "445566"])
+def test_matches_serial_search(pool, moves):
+    board = Board.from_moves(moves)
+    for depth in (1, 3, 5):
+        context = SearchContext()
+        context.late_move_reductions = False
+        assert pool.search(board, depth) == negamax(board, depth, context=context)
+
+
+def test_finished_game_is_answered_without_workers(pool):
+    board = Board.from_moves("1212121")
+    assert pool.search(board, 3)[0] is None
+
+
+def test_get_best_move_uses_pool(pool):
+    nodes = pool.nodes
+    board = Board.from_moves("4453")
+    assert get_best_move(board, pool=pool) in board.valid_locations()
+    assert pool.nodes > nodes
+    assert board.to_moves() == "4453"
+
+
+def test_time_limit_applies_to_workers(pool):
+    board = Board.from_moves("4453")
+    start = time.perf_counter()
+    col = get_best_move(board, time_limit_ms=50, max_depth=20, pool=pool)
+    assert time.perf_counter() - start < 1.0
+    assert col in board.valid_locations()
+
+
+def test_pool_requires_negamax(pool):
+    with pytest.raises(ValueError):
+        get_best_move(Board(), engine="minimax", pool=pool)
+
+
+def test_pools_reject_node_budgets(pool):
+    with pytest.raises(ValueError):
+        get_best_move(Board(), max_nodes=200, pool=pool)
+    with LazySMPSearch(threads=1) as smp, pytest.raises(ValueError):
+        get_best_move(Board(), max_nodes=200, pool=smp)
+
+
+def test_lazy_smp_finds_forced_moves():
+    with LazySMPSearch(threads=3) as smp:
+        assert smp.search(Board.from_moves("112233"), 4)[0] == 3
+        assert smp.search(Board.from_moves("1213145"), 4)[0] == 0
+        assert smp.nodes > 0
+
+
+def test_lazy_smp_search_leaves_board_unchanged():
+    board = Board.from_moves("4453")
+    with LazySMPSearch(threads=2) as smp:
+        col, _ = smp.search(board, 4)
+        assert col in board.valid_locations()
+        assert smp.contexts[0].nodes > 0
+    assert board.to_moves() == "4453"
+
+
+def test_lazy_smp_time_limit_stops_every_thread():
+    board = Board.from_moves("4453")
+    with LazySMPSearch(threads=3) as smp:
+        start = time.perf_counter()
+        col = get_best_move(board, time_limit_ms=50, max_depth=20, pool=smp)
+        assert time.perf_counter() - start < 1.0
+    assert col in board.valid_locations()
+    assert board.to_moves() == "4453"
@@ -0,0 +1,68 @@
+import time
+
+from ai import PLAYER_PIECE
+from board import Board
+from ponder import Ponderer
+from tt import TranspositionTable
+
+
+def test_pondered_reply_is_answered_without_search():
+    board = Board.from_moves("445")
+    ponderer = Ponderer(max_depth=4, table=TranspositionTable(size_mb=1))
+    ponderer.start(board)
+    ponderer.wait()
+
+    # Every reply has an answer, ready before the player has moved
+    assert len(ponderer.results) == len(board.valid_locations())
+    for col in board.valid_locations():
+        child = board.copy()
+        child.push(col, PLAYER_PIECE)
+        assert ponderer.results[child.to_key()] in child.valid_locations()
+
+    board.push(2, PLAYER_PIECE)
+    assert ponderer.take(board) == ponderer.results[board.to_key()]
+    assert ponderer.hits == 1
+
+
+def test_pondering_finds_the_block():
+    # The player's 1, 2, 3 on the bottom row leaves 4 as the only block
+    board = Board.from_moves("1525")
+    ponderer = Ponderer(max_depth=4, table=TranspositionTable(size_mb=1))
+    ponderer.start(board)
+    ponderer.wait()
+    board.push(2, PLAYER_PIECE)
+    assert ponderer.take(board) == 3
+
+
+def test_unpondered_position_misses():
+    ponderer = Ponderer(max_depth=2, table=TranspositionTable(size_mb=1))
+    ponderer.start(Board.from_moves("4"))
+    ponderer.wait()
+    assert ponderer.take(Board.from_moves("4444")) is None
+    assert ponderer.misses == 1
+
+
+def test_stop_interrupts_a_long_search():
+    board = Board.from_moves("4")
+    ponderer = Ponderer(max_depth=30, table=TranspositionTable(size_mb=1))
+    ponderer.start(board)
+    time.sleep(0.05)
+    start = time.perf_counter()
+    ponderer.stop()
+    assert time.perf_counter() - start < 0.5
+    # Interrupted searches leave no answers behind, and the board is untouched
+    assert all(col is not None for col in ponderer.results.values())
+    assert board.to_moves() == "4"
+    board.push(3, PLAYER_PIECE)
+    assert ponderer.take(board) in (None, *board.valid_locations())
+
+
+def test_pondering_follows_the_search_limits():
+    board = Board.from_moves("4453")
+    ponderer = Ponderer(
+        max_depth=20, table=TranspositionTable(size_mb=1), max_nodes=300
+    )
+    ponderer.start(board)
+    ponderer.wait()
+    # A max_depth of 20 finishes only because every search keeps to the budget
+    assert len(ponderer.results) == len(board.valid_locations())
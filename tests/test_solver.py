@@ -0,0 +1,111 @@
+import functools
+import random
+import time
+
+import pytest
+
+from ai import AI_PIECE, PLAYER_PIECE, SearchContext, SearchTimeout, get_best_move
+from board import Board
+from solver import DRAW, LOSS, WIN, Solver
+
+
+def brute_force_score(board, piece):
+    """Plain negamax over the whole game tree, scored like the solver."""
+    geometry = board.geometry
+
+    @functools.lru_cache(maxsize=None)
+    def search(current, mask, moves):
+        best = None
+        for c in range(geometry.columns):
+            column = ((1 << geometry.rows) - 1) << (c * geometry.column_bits)
+            move = (mask + geometry.bottom_mask) & column
+            if not move:
+                continue
+            if geometry.has_line(current | move):
+                return (geometry.cell_count + 1 - moves) // 2
+            score = -search(current ^ mask, mask | move, moves + 1)
+            best = score if best is None else max(best, score)
+        return 0 if best is None else best
+
+    mask = board.bitboards[1] | board.bitboards[2]
+    return search(board.bitboards[piece], mask, board.moves)
+
+
+def random_endgames(rows, columns, connect, empty, count, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = Board(rows, columns, connect)
+        while board.geometry.cell_count - board.moves > empty:
+            col = rng.choice(board.valid_locations())
+            if board.winning_move_at(board.push(col), col):
+                break
+        else:
+            boards.append(board)
+    return boards
+
+
+@pytest.mark.parametrize("variant", [(6, 7, 4), (4, 5, 3), (5, 6, 5)])
+def test_scores_match_brute_force(variant):
+    solver = Solver(cache_mb=1)
+    for board in random_endgames(*variant, empty=10, count=15):
+        piece = PLAYER_PIECE if board.moves % 2 == 0 else AI_PIECE
+        expected = brute_force_score(board, piece)
+        assert solver.solve(board, piece) == expected
+        assert solver.best_move(board, piece)[1] == expected
+
+
+def test_outcome_counts_plies_of_best_play():
+    solver = Solver(cache_mb=1)
+    for board in random_endgames(6, 7, 4, empty=10, count=15, seed=1):
+        piece = PLAYER_PIECE if board.moves % 2 == 0 else AI_PIECE
+        result, distance = solver.outcome(solver.solve(board, piece), board.moves)
+
+        # Both sides play the solver's moves until the game ends
+        plies, winner = 0, None
+        while winner is None and not board.is_tie():
+            col, _ = solver.best_move(board, piece)
+            if board.winning_move_at(board.push(col, piece), col):
+                winner = piece
+            piece = AI_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+            plies += 1
+
+        if result == DRAW:
+            assert winner is None and distance is None
+        else:
+            assert distance == plies
+            assert winner is not None
+            assert (result == WIN) == (plies % 2 == 1) == (result != LOSS)
+
+
+def test_deadline_raises_search_timeout():
+    solver = Solver(cache_mb=1)
+    solver.deadline = time.perf_counter()
+    with pytest.raises(SearchTimeout):
+        solver.solve(Board.from_moves("4453"), PLAYER_PIECE)
+
+
+def test_large_variants_are_refused():
+    assert not Solver.supports(Board(20, 20).geometry)
+    with pytest.raises(ValueError):
+        Solver(cache_mb=1).solve(Board(20, 20), PLAYER_PIECE)
+
+
+def test_get_best_move_solves_endgames():
+    board = random_endgames(6, 7, 4, empty=11, count=1, seed=2)[0]
+    if board.moves % 2 == 0:
+        board.push(board.valid_locations()[0])
+    solver = Solver(cache_mb=1)
+    context = SearchContext()
+    col = get_best_move(board, context=context, solver=solver)
+    assert context.nodes == 0
+    expected, score = solver.best_move(board, AI_PIECE)
+    assert col == expected
+    assert score is not None
+
+
+def test_get_best_move_skips_solver_early_and_after_game_end():
+    solver = Solver(cache_mb=1)
+    assert get_best_move(Board.from_moves("4453"), max_depth=2, solver=solver) in range(7)
+    assert solver.nodes == 0
+    assert get_best_move(Board.from_moves("1212121"), solver=solver, endgame_cells=42) is None
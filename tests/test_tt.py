@@ -0,0 +1,82 @@
+import threading
+
+from tt import (
+    ENTRY_SIZE,
+    EXACT,
+    LOWER,
+    UPPER,
+    SharedTranspositionTable,
+    TranspositionTable,
+)
+
+
+def test_size_follows_memory_budget():
+    table = TranspositionTable(size_mb=1)
+    assert len(table) * ENTRY_SIZE <= 1024 * 1024
+    assert len(table) > 1024 * 1024 // ENTRY_SIZE - 2
+
+
+def test_probe_missing_key_returns_none():
+    table = TranspositionTable(size_mb=1)
+    assert table.probe(0) is None
+    assert table.probe(12345) is None
+
+
+def test_store_and_probe_round_trip():
+    table = TranspositionTable(size_mb=1)
+    table.store(42, 5, -300, LOWER, 3)
+    assert table.probe(42) == (5, -300, LOWER, 3)
+
+    table.store(0, 2, 7, EXACT, None)
+    assert table.probe(0) == (2, 7, EXACT, None)
+
+
+def test_depth_beyond_a_signed_byte():
+    # Searches of the big variants go past 127 plies
+    table = TranspositionTable(size_mb=1)
+    table.store(42, 400, 9, EXACT, 3)
+    assert table.probe(42) == (400, 9, EXACT, 3)
+
+
+def test_deep_entry_survives_shallow_collisions():
+    table = TranspositionTable(size_mb=1)
+    buckets = table.bucket_count
+    deep, shallow, newer = 1, 1 + buckets, 1 + 2 * buckets
+
+    table.store(deep, 8, 100, EXACT, 2)
+    table.store(shallow, 1, 5, UPPER, 4)
+    assert table.probe(deep) == (8, 100, EXACT, 2)
+    assert table.probe(shallow) == (1, 5, UPPER, 4)
+
+    # The always-replace slot takes the newest shallow entry
+    table.store(newer, 2, 6, EXACT, 0)
+    assert table.probe(deep) is not None
+    assert table.probe(shallow) is None
+    assert table.probe(newer) == (2, 6, EXACT, 0)
+
+
+def test_clear_empties_table():
+    table = TranspositionTable(size_mb=1)
+    table.store(99, 3, 1, EXACT, 1)
+    table.clear()
+    assert table.probe(99) is None
+
+
+def test_shared_table_survives_concurrent_stores():
+    table = SharedTranspositionTable(size_mb=1, stripes=4)
+
+    def fill(offset):
+        for key in range(offset, 20000, 4):
+            table.store(key, key % 50, -key, EXACT, key % 7)
+
+    threads = [threading.Thread(target=fill, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every entry that is still there must be one whole store, never a mix
+    for key in range(20000):
+        entry = table.probe(key)
+        if entry is not None:
+            assert entry == (key % 50, -key, EXACT, key % 7)
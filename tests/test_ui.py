@@ -235,3 +235,35 @@ def test_draw_menu_renders_text(mock_pygame, mock_get_smiley):
 
     # Should blit text to screen
     assert mock_screen.blit.called
+
+
+# Test the difficulty menu
+def test_get_difficulty_choice():
+    from ui import get_difficulty_choice
+
+    # Option i's hitbox is y: 200 + 100 * (i - 1) up to the next option
+    assert get_difficulty_choice((350, 200), 3) == 1
+    assert get_difficulty_choice((350, 299), 3) == 1
+    assert get_difficulty_choice((350, 300), 3) == 2
+    assert get_difficulty_choice((100, 450), 3) == 3
+    assert get_difficulty_choice((350, 199), 3) is None
+    assert get_difficulty_choice((350, 500), 3) is None
+
+
+@patch("ui.pygame")
+def test_draw_difficulty_menu_renders_each_level(mock_pygame):
+    from unittest.mock import MagicMock
+
+    from ui import draw_difficulty_menu
+
+    mock_screen = MagicMock()
+    mock_font = MagicMock()
+    mock_pygame.font.Font.return_value = mock_font
+
+    draw_difficulty_menu(mock_screen, "fake/font/path.ttf", ["easy", "medium", "hard"])
+
+    mock_screen.fill.assert_called()
+    rendered = [call.args[0] for call in mock_font.render.call_args_list]
+    assert "[1] Easy" in rendered
+    assert "[3] Hard" in rendered
+    assert mock_pygame.display.update.called
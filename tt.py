@@ -0,0 +1,93 @@
+"""
+Transposition table for the Pyoneer search.
+
+Entries live in preallocated typed arrays sized from a memory budget, so
+the table never grows during a search. Each bucket has two slots: the
+first keeps the deepest result seen for its bucket, the second is always
+overwritten, so shallow results still get cached without evicting
+expensive deep ones.
+
+SharedTranspositionTable adds striped locks so several search threads can
+use one table without tearing entries.
+"""
+
+import threading
+from array import array
+
+# Bound types
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# Bytes per entry: key, score, depth, bound type, best move
+ENTRY_SIZE = 8 + 8 + 2 + 1 + 1
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        self.size_mb = size_mb
+        self.bucket_count = max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_SIZE))
+        self.clear()
+
+    def __len__(self):
+        """Number of slots, filled or not."""
+        return 2 * self.bucket_count
+
+    def clear(self):
+        slots = 2 * self.bucket_count
+        self.keys = array("Q", bytes(8 * slots))
+        self.scores = array("q", bytes(8 * slots))
+        # Two bytes, since a search can go deeper than 127 plies on big boards
+        self.depths = array("h", bytes(2 * slots))
+        # A zero bound type marks an empty slot
+        self.flags = array("b", bytes(slots))
+        self.moves = array("b", bytes(slots))
+
+    def probe(self, key):
+        """Return (depth, score, flag, move) stored for key, or None."""
+        slot = (key % self.bucket_count) * 2
+        if not (self.flags[slot] and self.keys[slot] == key):
+            slot += 1
+            if not (self.flags[slot] and self.keys[slot] == key):
+                return None
+        move = self.moves[slot]
+        return (
+            self.depths[slot],
+            self.scores[slot],
+            self.flags[slot],
+            None if move < 0 else move,
+        )
+
+    def store(self, key, depth, score, flag, move):
+        slot = (key % self.bucket_count) * 2
+        # Depth-preferred slot first, unless it holds a deeper result for
+        # another position; then fall back to the always-replace slot
+        if self.flags[slot] and self.keys[slot] != key and depth < self.depths[slot]:
+            slot += 1
+        self.keys[slot] = key
+        self.scores[slot] = score
+        self.depths[slot] = depth
+        self.flags[slot] = flag
+        self.moves[slot] = -1 if move is None else move
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """A TranspositionTable that several threads may probe and store at once.
+
+    Each bucket is guarded by one of a fixed set of locks (bucket index
+    modulo the stripe count), so threads only contend when they touch
+    buckets in the same stripe. clear() is not locked; call it between
+    searches.
+    """
+
+    def __init__(self, size_mb=16, stripes=64):
+        self.locks = [threading.Lock() for _ in range(stripes)]
+        super().__init__(size_mb)
+
+    def probe(self, key):
+        with self.locks[key % self.bucket_count % len(self.locks)]:
+            return super().probe(key)
+
+    def store(self, key, depth, score, flag, move):
+        with self.locks[key % self.bucket_count % len(self.locks)]:
+            super().store(key, depth, score, flag, move)
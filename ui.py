@@ -1,5 +1,6 @@
 import pygame
 
+from board import COLUMN_COUNT, ROW_COUNT
 from utils import resource_path
 
 # --- Colors ---
@@ -16,9 +17,6 @@ DARK_GREEN = (0, 100, 0)
 SQUARESIZE = 100
 RADIUS = int(SQUARESIZE / 2 - 5)
 
-ROW_COUNT = 6
-COLUMN_COUNT = 7
-
 WIDTH = COLUMN_COUNT * SQUARESIZE
 HEIGHT = (ROW_COUNT + 1) * SQUARESIZE  # +1 for the piece drop area
 
@@ -54,9 +52,10 @@ def draw_board(screen, board):
                 RADIUS,
             )
 
+    grid = board.board
     for c in range(COLUMN_COUNT):
         for r in range(ROW_COUNT):
-            if board.board[r][c] == 1:
+            if grid[r][c] == 1:
                 pygame.draw.circle(
                     screen,
                     BLUE,
@@ -66,7 +65,7 @@ def draw_board(screen, board):
                     ),
                     RADIUS,
                 )
-            elif board.board[r][c] == 2:
+            elif grid[r][c] == 2:
                 pygame.draw.circle(
                     screen,
                     YELLOW,
@@ -151,3 +150,54 @@ def get_menu_choice(pos):
         return 2
 
     return None
+
+
+def draw_difficulty_menu(screen, font_path, levels):
+    """Draw the difficulty selection menu, one option per level name."""
+    screen.fill(BLACK)
+
+    title_font = pygame.font.Font(font_path, 70)
+    option_font = pygame.font.Font(font_path, 40)
+    small_font = pygame.font.Font(font_path, 25)
+
+    # Title
+    title_text = title_font.render("DIFFICULTY", True, GREEN)
+    title_rect = title_text.get_rect(center=(WIDTH // 2, 65))
+    screen.blit(title_text, title_rect)
+
+    pygame.draw.line(
+        screen,
+        GREEN,
+        (100, title_rect.height + 30),
+        (WIDTH - 100, title_rect.height + 30),
+        3,
+    )
+
+    # One option per level, 100px apart, from easiest to hardest
+    colors = (BLUE, YELLOW, ORANGE)
+    for i, level in enumerate(levels):
+        option_text = option_font.render(
+            f"[{i + 1}] {level.capitalize()}", True, colors[i % len(colors)]
+        )
+        option_rect = option_text.get_rect(center=(WIDTH // 2, 250 + 100 * i))
+        screen.blit(option_text, option_rect)
+
+    keys = "/".join(str(i + 1) for i in range(len(levels)))
+    subtitle_text = small_font.render(f"Click or press {keys} to select", True, GRAY)
+    subtitle_rect = subtitle_text.get_rect(center=(WIDTH // 2, 600))
+    screen.blit(subtitle_text, subtitle_rect)
+
+    pygame.display.update()
+
+
+def get_difficulty_choice(pos, count):
+    """
+    Determine which of count difficulty options was clicked.
+    Returns the option's number, starting at 1, or None if none was clicked.
+    """
+    x, y = pos
+
+    # Option i is drawn at y = 250 + 100 * (i - 1), with a 100px hitbox
+    if 200 <= y < 200 + 100 * count:
+        return (y - 200) // 100 + 1
+    return None